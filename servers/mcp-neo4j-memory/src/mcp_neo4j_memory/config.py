@@ -1,10 +1,49 @@
 # Configuration for BGE-large vector embeddings
+import os
+
+# Neo4j connection pool size; concurrent batch and relation writes each hold
+# a connection while they run
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.environ.get("NEO4J_MAX_CONNECTION_POOL_SIZE", "100"))
 
 # Model settings
 EMBEDDING_MODEL = "BAAI/bge-large-en-v1.5"
 EMBEDDING_DIMENSIONS = 1024  # BGE-large uses 1024 dimensions
 SIMILARITY_THRESHOLD = 0.7   # Higher threshold for 1024-dim space
 BATCH_SIZE = 16              # Optimal batch size for BGE-large on CPU
+MAX_SEQ_LENGTH = 512         # Token cap for content and observation texts
+IDENTITY_MAX_SEQ_LENGTH = 64 # "name (type)" strings are short, so cap them lower
+
+# Inference backend: "torch", "onnx" or "openvino" (the last two need the matching extra)
+# Falls back to torch if the backend can't be loaded
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+# Optional model file for onnx/openvino, e.g. "onnx/model_qint8_avx512.onnx"
+EMBEDDING_MODEL_FILE = os.environ.get("EMBEDDING_MODEL_FILE")
+# Where onnx/openvino model files are downloaded and exported
+EMBEDDING_CACHE_DIR = os.path.expanduser(
+    os.environ.get("EMBEDDING_CACHE_DIR", "~/.cache/mcp_neo4j_memory")
+)
+
+# Weight precision on CUDA: "float16", "bfloat16" or "float32" (CPU always uses float32)
+EMBED_DTYPE = os.environ.get("EMBED_DTYPE", "float16")
+
+# Dynamic int8 quantization of the encoder's Linear layers on CPU ("int8" or "none")
+EMBED_QUANTIZE = os.environ.get("EMBED_QUANTIZE", "none")
+
+# In-memory LRU cache of recent embeddings, in texts (0 disables)
+# Vectors are stored as float16, ~2KB per text for 1024 dimensions
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "10000"))
+
+# SQLite file that keeps embeddings across restarts, checked after the LRU
+# (unset disables). Entries are namespaced by model, backend and model file
+EMBEDDING_DISK_CACHE = os.environ.get("EMBEDDING_DISK_CACHE")
+
+# Encoder worker processes for CPU hosts (0 = encode in-process)
+# Each worker loads its own copy of the model, so budget ~1.5GB RAM per worker
+ENCODER_WORKERS = int(os.environ.get("ENCODER_WORKERS", "0"))
+
+# Quantized vector index storage ("true"/"false"; needs Neo4j 5.23+). Unset keeps
+# the server default. Only applies when an index is created
+VECTOR_INDEX_QUANTIZATION = os.environ.get("VECTOR_INDEX_QUANTIZATION")
 
 # Vector index settings - using Entity base label
 VECTOR_INDEXES = [
@@ -25,6 +64,34 @@ VECTOR_INDEXES = [
     }
 ]
 
+# Range indexes for property lookups. Entity names are not unique (the same
+# name may exist with different types), so these are indexes, not constraints.
+# entity_name_type backs the (name, type) MERGE of entity writes
+RANGE_INDEXES = [
+    {
+        "name": "entity_name",
+        "label": "Entity",
+        "properties": ["name"]
+    },
+    {
+        "name": "entity_type",
+        "label": "Entity",
+        "properties": ["type"]
+    },
+    {
+        "name": "entity_name_type",
+        "label": "Entity",
+        "properties": ["name", "type"]
+    }
+]
+
+# Score weights per index for hybrid search (a node keeps its best weighted score)
+HYBRID_WEIGHTS = {
+    "entity_content_embeddings": 1.0,
+    "entity_observation_embeddings": 0.8,
+    "entity_identity_embeddings": 0.9,
+}
+
 # Search modes
 SEARCH_MODES = {
     "content": "content_embedding",      # Full context search
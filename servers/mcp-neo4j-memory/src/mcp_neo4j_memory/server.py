@@ -1,11 +1,12 @@
 import os
+import asyncio
 import logging
-import json
 from typing import Any, Dict, List, Optional
 from contextlib import asynccontextmanager
 
 import neo4j
-from neo4j import GraphDatabase
+import orjson
+from neo4j import AsyncGraphDatabase
 from pydantic import BaseModel
 
 import mcp.types as types
@@ -14,6 +15,7 @@ from mcp.server.models import InitializationOptions
 import mcp.server.stdio
 
 from .vector_memory import VectorEnabledNeo4jMemory
+from .config import NEO4J_MAX_CONNECTION_POOL_SIZE
 
 # Set up logging
 logger = logging.getLogger('mcp_neo4j_memory')
@@ -43,255 +45,268 @@ class ObservationDeletion(BaseModel):
     entityName: str
     observations: List[str]
 
-# Old Neo4jMemory class removed - now using VectorEnabledNeo4jMemory
-
-async def main(neo4j_uri: str, neo4j_user: str, neo4j_password: str, neo4j_database: str):
-    logger.info(f"Starting MCP Server with Neo4j URI: {neo4j_uri}")
-
-    # Store connection details for lazy initialization
-    memory = None
-    
-    def get_memory():
-        nonlocal memory
-        if memory is None:
-            # Connect to Neo4j when first needed
-            neo4j_driver = GraphDatabase.driver(
-                neo4j_uri,
-                auth=(neo4j_user, neo4j_password), 
-                database=neo4j_database
-            )
-            
-            # Verify connection
-            try:
-                neo4j_driver.verify_connectivity()
-                logger.info(f"Connected to Neo4j at {neo4j_uri}")
-                # Initialize memory with vector capabilities
-                memory = VectorEnabledNeo4jMemory(neo4j_driver)
-            except Exception as e:
-                logger.error(f"Failed to connect to Neo4j: {e}")
-                raise ConnectionError(f"Neo4j connection failed: {e}")
-        
-        return memory
-    
-    # Create MCP server
-    server = Server("mcp-neo4j-memory")
-
-    # Register handlers
-    @server.list_tools()
-    async def handle_list_tools() -> List[types.Tool]:
-        return [
-            types.Tool(
-                name="create_entities",
-                description="Create multiple new entities in the knowledge graph",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "entities": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "name": {"type": "string", "description": "The name of the entity"},
-                                    "type": {"type": "string", "description": "The type of the entity"},
-                                    "observations": {
-                                        "type": "array",
-                                        "items": {"type": "string"},
-                                        "description": "An array of observation contents associated with the entity"
-                                    },
-                                    "labels": {
-                                        "type": "array",
-                                        "items": {"type": "string"},
-                                        "minItems": 1,
-                                        "maxItems": 3,
-                                        "description": "Required array of 1-3 labels for multi-dimensional categorization of entities. Use labels to add meaningful dimensions beyond the primary type, such as: status/state, roles/relationships, qualities/characteristics, categories/domains, or temporal aspects. Labels can represent completely independent dimensions. Examples: ['Important', 'Blue'] for something significant that's blue, ['Work', 'Stressful'] for a job-related stressor, ['Family', 'Expensive'] for a costly family matter, ['Daily', 'Favorite'] for a beloved routine, ['Private', 'Ongoing'] for a personal current situation, ['Learning', 'Difficult'] for a challenging skill. Labels will be automatically CamelCased and sanitized for Neo4j compatibility."
-                                    },
-                                },
-                                "required": ["name", "type", "observations", "labels"],
+# Tool definitions are built once at import; list_tools returns the same list
+TOOLS = [
+    types.Tool(
+        name="create_entities",
+        description="Create multiple new entities in the knowledge graph",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "entities": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string", "description": "The name of the entity"},
+                            "type": {"type": "string", "description": "The type of the entity"},
+                            "observations": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "An array of observation contents associated with the entity"
+                            },
+                            "labels": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "minItems": 1,
+                                "maxItems": 3,
+                                "description": "Required array of 1-3 labels for multi-dimensional categorization of entities. Use labels to add meaningful dimensions beyond the primary type, such as: status/state, roles/relationships, qualities/characteristics, categories/domains, or temporal aspects. Labels can represent completely independent dimensions. Examples: ['Important', 'Blue'] for something significant that's blue, ['Work', 'Stressful'] for a job-related stressor, ['Family', 'Expensive'] for a costly family matter, ['Daily', 'Favorite'] for a beloved routine, ['Private', 'Ongoing'] for a personal current situation, ['Learning', 'Difficult'] for a challenging skill. Labels will be automatically CamelCased and sanitized for Neo4j compatibility."
                             },
                         },
+                        "required": ["name", "type", "observations", "labels"],
                     },
-                    "required": ["entities"],
                 },
-            ),
-            types.Tool(
-                name="create_relations",
-                description="Create multiple new relations between entities in the knowledge graph. Relations should be in active voice",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "relations": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "source": {"type": "string", "description": "The name of the entity where the relation starts"},
-                                    "target": {"type": "string", "description": "The name of the entity where the relation ends"},
-                                    "relationType": {"type": "string", "description": "The type of the relation"},
-                                },
-                                "required": ["source", "target", "relationType"],
-                            },
+            },
+            "required": ["entities"],
+        },
+    ),
+    types.Tool(
+        name="create_relations",
+        description="Create multiple new relations between entities in the knowledge graph. Relations should be in active voice",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "relations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "source": {"type": "string", "description": "The name of the entity where the relation starts"},
+                            "target": {"type": "string", "description": "The name of the entity where the relation ends"},
+                            "relationType": {"type": "string", "description": "The type of the relation"},
                         },
+                        "required": ["source", "target", "relationType"],
                     },
-                    "required": ["relations"],
                 },
-            ),
-            types.Tool(
-                name="add_observations",
-                description="Add new observations to existing entities in the knowledge graph",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "observations": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "entityName": {"type": "string", "description": "The name of the entity to add the observations to"},
-                                    "contents": {
-                                        "type": "array",
-                                        "items": {"type": "string"},
-                                        "description": "An array of observation contents to add"
-                                    },
-                                },
-                                "required": ["entityName", "contents"],
+            },
+            "required": ["relations"],
+        },
+    ),
+    types.Tool(
+        name="add_observations",
+        description="Add new observations to existing entities in the knowledge graph",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "observations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "entityName": {"type": "string", "description": "The name of the entity to add the observations to"},
+                            "contents": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "An array of observation contents to add"
                             },
                         },
+                        "required": ["entityName", "contents"],
                     },
-                    "required": ["observations"],
                 },
-            ),
-            types.Tool(
-                name="delete_entities",
-                description="Delete multiple entities and their associated relations from the knowledge graph",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "entityNames": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "An array of entity names to delete"
-                        },
-                    },
-                    "required": ["entityNames"],
+            },
+            "required": ["observations"],
+        },
+    ),
+    types.Tool(
+        name="delete_entities",
+        description="Delete multiple entities and their associated relations from the knowledge graph",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "entityNames": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "An array of entity names to delete"
                 },
-            ),
-            types.Tool(
-                name="delete_observations",
-                description="Delete specific observations from entities in the knowledge graph",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "deletions": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "entityName": {"type": "string", "description": "The name of the entity containing the observations"},
-                                    "observations": {
-                                        "type": "array",
-                                        "items": {"type": "string"},
-                                        "description": "An array of observations to delete"
-                                    },
-                                },
-                                "required": ["entityName", "observations"],
+            },
+            "required": ["entityNames"],
+        },
+    ),
+    types.Tool(
+        name="delete_observations",
+        description="Delete specific observations from entities in the knowledge graph",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "deletions": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "entityName": {"type": "string", "description": "The name of the entity containing the observations"},
+                            "observations": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "An array of observations to delete"
                             },
                         },
+                        "required": ["entityName", "observations"],
                     },
-                    "required": ["deletions"],
                 },
-            ),
-            types.Tool(
-                name="delete_relations",
-                description="Delete multiple relations from the knowledge graph",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "relations": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "source": {"type": "string", "description": "The name of the entity where the relation starts"},
-                                    "target": {"type": "string", "description": "The name of the entity where the relation ends"},
-                                    "relationType": {"type": "string", "description": "The type of the relation"},
-                                },
-                                "required": ["source", "target", "relationType"],
-                            },
-                            "description": "An array of relations to delete"
+            },
+            "required": ["deletions"],
+        },
+    ),
+    types.Tool(
+        name="delete_relations",
+        description="Delete multiple relations from the knowledge graph",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "relations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "source": {"type": "string", "description": "The name of the entity where the relation starts"},
+                            "target": {"type": "string", "description": "The name of the entity where the relation ends"},
+                            "relationType": {"type": "string", "description": "The type of the relation"},
                         },
+                        "required": ["source", "target", "relationType"],
                     },
-                    "required": ["relations"],
-                },
-            ),
-            types.Tool(
-                name="read_graph",
-                description="Read the entire knowledge graph",
-                inputSchema={
-                    "type": "object",
-                    "properties": {},
-                },
-            ),
-            types.Tool(
-                name="search_nodes",
-                description="Search for nodes in the knowledge graph based on a query",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "The search query to match against entity names, types, and observation content"},
-                    },
-                    "required": ["query"],
+                    "description": "An array of relations to delete"
                 },
-            ),
-            types.Tool(
-                name="find_nodes",
-                description="Find specific nodes in the knowledge graph by their names",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "names": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "An array of entity names to retrieve",
-                        },
-                    },
-                    "required": ["names"],
+            },
+            "required": ["relations"],
+        },
+    ),
+    types.Tool(
+        name="read_graph",
+        description="Read the entire knowledge graph",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+        },
+    ),
+    types.Tool(
+        name="search_nodes",
+        description="Search for nodes in the knowledge graph based on a query",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "The search query to match against entity names, types, and observation content"},
+            },
+            "required": ["query"],
+        },
+    ),
+    types.Tool(
+        name="find_nodes",
+        description="Find specific nodes in the knowledge graph by their names",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "names": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "An array of entity names to retrieve",
                 },
-            ),
-            types.Tool(
-                name="open_nodes",
-                description="Open specific nodes in the knowledge graph by their names",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "names": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "An array of entity names to retrieve",
-                        },
-                    },
-                    "required": ["names"],
+            },
+            "required": ["names"],
+        },
+    ),
+    types.Tool(
+        name="open_nodes",
+        description="Open specific nodes in the knowledge graph by their names",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "names": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "An array of entity names to retrieve",
                 },
-            ),
-            types.Tool(
-                name="vector_search",
-                description="Semantic vector search across the knowledge graph using BGE-large embeddings",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "The semantic search query"},
-                        "mode": {
-                            "type": "string", 
-                            "enum": ["content", "observations", "identity"],
-                            "description": "Search mode: content (full context), observations (behavior/facts), identity (name/type)",
-                            "default": "content"
-                        },
-                        "limit": {"type": "integer", "description": "Maximum number of results to return", "default": 10},
-                        "threshold": {"type": "number", "description": "Similarity threshold (0.0-1.0)", "default": 0.7}
-                    },
-                    "required": ["query"],
+            },
+            "required": ["names"],
+        },
+    ),
+    types.Tool(
+        name="vector_search",
+        description="Semantic vector search across the knowledge graph using BGE-large embeddings",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "The semantic search query"},
+                "mode": {
+                    "type": "string", 
+                    "enum": ["content", "observations", "identity"],
+                    "description": "Search mode: content (full context), observations (behavior/facts), identity (name/type)",
+                    "default": "content"
                 },
-            ),
-        ]
+                "limit": {"type": "integer", "description": "Maximum number of results to return", "default": 10},
+                "threshold": {"type": "number", "description": "Similarity threshold (0.0-1.0)", "default": 0.7}
+            },
+            "required": ["query"],
+        },
+    ),
+]
+
+# Old Neo4jMemory class removed - now using VectorEnabledNeo4jMemory
+
+async def main(neo4j_uri: str, neo4j_user: str, neo4j_password: str, neo4j_database: str):
+    logger.info(f"Starting MCP Server with Neo4j URI: {neo4j_uri}")
+
+    # Store connection details for lazy initialization
+    memory = None
+    memory_lock = asyncio.Lock()
+    
+    async def get_memory():
+        nonlocal memory
+        async with memory_lock:
+            if memory is None:
+                # Connect to Neo4j when first needed
+                neo4j_driver = AsyncGraphDatabase.driver(
+                    neo4j_uri,
+                    auth=(neo4j_user, neo4j_password),
+                    max_connection_pool_size=NEO4J_MAX_CONNECTION_POOL_SIZE
+                )
+                
+                # Verify connection
+                new_memory = None
+                try:
+                    await neo4j_driver.verify_connectivity()
+                    logger.info(f"Connected to Neo4j at {neo4j_uri}")
+                    # Initialize memory with vector capabilities
+                    new_memory = VectorEnabledNeo4jMemory(neo4j_driver, database=neo4j_database)
+                    await new_memory.ensure_schema()
+                    memory = new_memory
+                except Exception as e:
+                    logger.error(f"Failed to connect to Neo4j: {e}")
+                    # The next call builds a new driver, so release this one's pool
+                    # (and any encoder workers started for it)
+                    if new_memory is not None:
+                        new_memory.close()
+                    await neo4j_driver.close()
+                    raise ConnectionError(f"Neo4j connection failed: {e}")
+        
+        return memory
+    
+    # Create MCP server
+    server = Server("mcp-neo4j-memory")
+
+    # Register handlers
+    @server.list_tools()
+    async def handle_list_tools() -> List[types.Tool]:
+        return TOOLS
 
     @server.call_tool()
     async def handle_call_tool(
@@ -299,11 +314,11 @@ async def main(neo4j_uri: str, neo4j_user: str, neo4j_password: str, neo4j_datab
     ) -> List[types.TextContent | types.ImageContent]:
         try:
             # Get memory instance (lazy connection)
-            mem = get_memory()
+            mem = await get_memory()
             
             if name == "read_graph":
                 result = await mem.read_graph()
-                return [types.TextContent(type="text", text=json.dumps(result.model_dump(), indent=2))]
+                return [types.TextContent(type="text", text=orjson.dumps(result.model_dump(mode="json")).decode())]
 
             if not arguments:
                 raise ValueError(f"No arguments provided for tool: {name}")
@@ -311,17 +326,17 @@ async def main(neo4j_uri: str, neo4j_user: str, neo4j_password: str, neo4j_datab
             if name == "create_entities":
                 entities = [Entity(**entity) for entity in arguments.get("entities", [])]
                 result = await mem.create_entities(entities)
-                return [types.TextContent(type="text", text=json.dumps([e.model_dump() for e in result], indent=2))]
+                return [types.TextContent(type="text", text=orjson.dumps([e.model_dump(mode="json") for e in result]).decode())]
                 
             elif name == "create_relations":
                 relations = [Relation(**relation) for relation in arguments.get("relations", [])]
                 result = await mem.create_relations(relations)
-                return [types.TextContent(type="text", text=json.dumps([r.model_dump() for r in result], indent=2))]
+                return [types.TextContent(type="text", text=orjson.dumps([r.model_dump(mode="json") for r in result]).decode())]
                 
             elif name == "add_observations":
                 observations = [ObservationAddition(**obs) for obs in arguments.get("observations", [])]
                 result = await mem.add_observations(observations)
-                return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
+                return [types.TextContent(type="text", text=orjson.dumps(result).decode())]
                 
             elif name == "delete_entities":
                 await mem.delete_entities(arguments.get("entityNames", []))
@@ -339,11 +354,11 @@ async def main(neo4j_uri: str, neo4j_user: str, neo4j_password: str, neo4j_datab
                 
             elif name == "search_nodes":
                 result = await mem.search_nodes(arguments.get("query", ""))
-                return [types.TextContent(type="text", text=json.dumps(result.model_dump(), indent=2))]
+                return [types.TextContent(type="text", text=orjson.dumps(result.model_dump(mode="json")).decode())]
                 
             elif name == "find_nodes" or name == "open_nodes":
                 result = await mem.find_nodes(arguments.get("names", []))
-                return [types.TextContent(type="text", text=json.dumps(result.model_dump(), indent=2))]
+                return [types.TextContent(type="text", text=orjson.dumps(result.model_dump(mode="json")).decode())]
                 
             elif name == "vector_search":
                 result = await mem.vector_search(
@@ -352,7 +367,7 @@ async def main(neo4j_uri: str, neo4j_user: str, neo4j_password: str, neo4j_datab
                     limit=arguments.get("limit", 10),
                     threshold=arguments.get("threshold", 0.7)
                 )
-                return [types.TextContent(type="text", text=json.dumps(result.model_dump(), indent=2))]
+                return [types.TextContent(type="text", text=orjson.dumps(result.model_dump(mode="json")).decode())]
                 
             else:
                 raise ValueError(f"Unknown tool: {name}")
@@ -362,17 +377,23 @@ async def main(neo4j_uri: str, neo4j_user: str, neo4j_password: str, neo4j_datab
             return [types.TextContent(type="text", text=f"Error: {str(e)}")]
 
     # Start the server
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        logger.info("MCP Knowledge Graph Memory using Neo4j running on stdio")
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="mcp-neo4j-memory",
-                server_version="1.1",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            logger.info("MCP Knowledge Graph Memory using Neo4j running on stdio")
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="mcp-neo4j-memory",
+                    server_version="1.1",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        # Stop encoder workers and release the connection pool on shutdown
+        if memory is not None:
+            memory.close()
+            await memory.neo4j_driver.close()
@@ -1,8 +1,16 @@
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 import asyncio
+import hashlib
+import multiprocessing
 import os
 import re
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 
 from sentence_transformers import SentenceTransformer
 import numpy as np
@@ -14,29 +22,463 @@ from .config import (
     EMBEDDING_DIMENSIONS, 
     SIMILARITY_THRESHOLD, 
     BATCH_SIZE,
+    MAX_SEQ_LENGTH,
+    IDENTITY_MAX_SEQ_LENGTH,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_FILE,
+    EMBEDDING_CACHE_DIR,
+    EMBED_DTYPE,
+    EMBED_QUANTIZE,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_DISK_CACHE,
+    ENCODER_WORKERS,
     VECTOR_INDEXES,
+    RANGE_INDEXES,
+    VECTOR_INDEX_QUANTIZATION,
+    HYBRID_WEIGHTS,
     SEARCH_MODES
 )
 
 logger = logging.getLogger(__name__)
 
+def _load_exported_encoder(device: str) -> SentenceTransformer:
+    """Load the onnx/openvino export from the local cache, exporting it on first start"""
+    export_dir = os.path.join(
+        EMBEDDING_CACHE_DIR, "exported", EMBEDDING_BACKEND, EMBEDDING_MODEL.replace("/", "__")
+    )
+    if os.path.isdir(export_dir):
+        return SentenceTransformer(export_dir, device=device, backend=EMBEDDING_BACKEND)
+    
+    logger.info(f"Exporting {EMBEDDING_MODEL} to {EMBEDDING_BACKEND}, this runs once")
+    encoder = SentenceTransformer(
+        EMBEDDING_MODEL,
+        device=device,
+        backend=EMBEDDING_BACKEND,
+        cache_folder=EMBEDDING_CACHE_DIR
+    )
+    try:
+        encoder.save_pretrained(export_dir)
+    except Exception as e:
+        logger.warning(f"Could not save {EMBEDDING_BACKEND} export to {export_dir} ({e})")
+    return encoder
+
+def _load_encoder(device: str) -> SentenceTransformer:
+    """Load the embedding model on the configured backend, falling back to PyTorch"""
+    if EMBEDDING_BACKEND != "torch":
+        try:
+            if EMBEDDING_MODEL_FILE:
+                # Prebuilt file from the model repo, nothing to export
+                encoder = SentenceTransformer(
+                    EMBEDDING_MODEL,
+                    device=device,
+                    backend=EMBEDDING_BACKEND,
+                    model_kwargs={"file_name": EMBEDDING_MODEL_FILE},
+                    cache_folder=EMBEDDING_CACHE_DIR
+                )
+            else:
+                encoder = _load_exported_encoder(device)
+            encoder.max_seq_length = MAX_SEQ_LENGTH
+            encoder.eval()
+            return encoder
+        except Exception as e:
+            logger.warning(f"Failed to load {EMBEDDING_BACKEND} backend ({e}), falling back to PyTorch")
+    
+    encoder = SentenceTransformer(EMBEDDING_MODEL, device=device)
+    encoder.max_seq_length = MAX_SEQ_LENGTH  # Optimize for memory content
+    encoder.eval()  # Inference only: disables dropout
+    
+    # Half precision uses tensor cores and halves weight bandwidth on GPU
+    if device == 'cuda' and EMBED_DTYPE in ('float16', 'bfloat16'):
+        logger.info(f"Casting encoder weights to {EMBED_DTYPE}")
+        encoder.to(getattr(torch, EMBED_DTYPE))
+    
+    # int8 matmuls for the Linear layers; only pays off on CPUs with VNNI/AMX
+    if device == 'cpu' and EMBED_QUANTIZE == 'int8':
+        try:
+            torch.ao.quantization.quantize_dynamic(encoder, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+            logger.info("Applied dynamic int8 quantization to the encoder")
+        except Exception as e:
+            logger.warning(f"Dynamic int8 quantization failed ({e}), using float32 weights")
+    return encoder
+
+@lru_cache(maxsize=4)
+def _get_encoder(device: str) -> SentenceTransformer:
+    """Encoder shared by every memory instance on a device, loaded on first use"""
+    return _load_encoder(device)
+
+# Guards the shared encoder, since max_seq_length is swapped per call
+_forward_lock = threading.Lock()
+
+# Per-process encoder for ProcessPoolExecutor workers
+_worker_encoder = None
+
+def _encode_with_length(encoder, texts, max_seq_length: int, batch_size: int) -> np.ndarray:
+    """Encode under inference_mode with a temporary token cap
+    
+    sentence-transformers already sorts each call by length and pads per
+    sub-batch; the cap only matters for the few texts longer than it.
+    """
+    default_length = encoder.max_seq_length
+    encoder.max_seq_length = max_seq_length
+    try:
+        with torch.inference_mode():
+            return encoder.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+    finally:
+        encoder.max_seq_length = default_length
+
+def _encode_batch(texts: List[str], max_seq_length: int = MAX_SEQ_LENGTH) -> np.ndarray:
+    """Encode texts inside a worker process (top-level so it can be pickled)"""
+    global _worker_encoder
+    if _worker_encoder is None:
+        _worker_encoder = _load_encoder('cpu')
+    return _encode_with_length(_worker_encoder, texts, max_seq_length, BATCH_SIZE)
+
+def _text_key(text: str, max_seq_length: int = MAX_SEQ_LENGTH) -> bytes:
+    """Fixed-size cache key for a text at a given token cap"""
+    return hashlib.blake2b(f"{max_seq_length}:{text}".encode('utf-8'), digest_size=16).digest()
+
+def _content_hash(texts: List[str]) -> str:
+    """Hash of the texts an entity's embeddings were generated from"""
+    return hashlib.blake2b("\x1f".join(texts).encode('utf-8'), digest_size=16).hexdigest()
+
+class _DiskEmbeddingCache:
+    """SQLite store of float16 embeddings keyed by _text_key, shared across restarts
+    
+    Keys are namespaced by the model settings, so switching model, backend or
+    model file doesn't serve vectors from another embedding space.
+    """
+    
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._model = f"{EMBEDDING_MODEL}:{EMBEDDING_BACKEND}:{EMBEDDING_MODEL_FILE or ''}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, key)
+            )
+        """)
+        self._conn.commit()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found = {}
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [self._model, *chunk]
+                )
+                for key, vector in rows:
+                    found[bytes(key)] = np.frombuffer(vector, dtype=np.float16)
+        return found
+    
+    def put_many(self, vectors: Dict[bytes, np.ndarray]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                [(self._model, key, vector.astype(np.float16).tobytes()) for key, vector in vectors.items()]
+            )
+            self._conn.commit()
+
+def _as_vector(embedding) -> np.ndarray:
+    """Contiguous float32 vector, the form embeddings are kept in until they become query parameters"""
+    return np.ascontiguousarray(embedding, dtype=np.float32)
+
+def _as_param(embedding) -> List[float]:
+    """Embedding as a Cypher parameter
+    
+    PackStream has no array type: an ndarray is packed as a generic sequence,
+    one numpy scalar at a time, which is slower than packing a plain float list.
+    """
+    return _as_vector(embedding).tolist()
+
+_CLEAN_RE = re.compile(r'[^a-zA-Z0-9_\s]')
+_SPLIT_RE = re.compile(r'[\s_]+')
+_SAFE_REL_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+# smart_search routing cues, matched as plain substrings of the lowercased query
+_QUESTION_WORD_RE = re.compile('what|how|why')
+_QUESTION_RE = re.compile('what is|who is|tell me about|explain')
+_BEHAVIOUR_RE = re.compile('does|can|did|involved in|related to')
+
+@lru_cache(maxsize=4096)
+def _sanitize_label(label: str) -> Optional[str]:
+    """CamelCase a single label according to Neo4j rules (None if nothing is left)"""
+    # Remove special characters and split on common separators
+    words = _SPLIT_RE.split(_CLEAN_RE.sub('', label))
+    
+    # CamelCase: first letter of each word capitalized, rest lowercase
+    camel_cased = ''.join(word.capitalize() for word in words if word)
+    
+    # Ensure it starts with a letter (Neo4j requirement)
+    if camel_cased and camel_cased[0].isalpha():
+        return camel_cased
+    elif camel_cased:
+        # If starts with number/underscore, prepend 'Label'
+        return f"Label{camel_cased}"
+    return None
+
+def _safe_rel_type(relation_type: str) -> str:
+    """Relationship type with anything outside [a-zA-Z0-9_] replaced by '_'"""
+    return _SAFE_REL_RE.sub('_', relation_type)
+
+# Labels and relationship types can't be parameterized, so the query text is
+# built once per label set or (sanitized) type and reused, keeping it identical
+# for Neo4j's plan cache
+@lru_cache(maxsize=1024)
+def _merge_entities_query(labels: tuple) -> str:
+    """UNWIND query merging $rows of entities, able to set the given labels"""
+    # Labels can't be parameterized, so each distinct (sanitized) label in the
+    # batch gets a conditional SET that only fires for rows carrying it
+    label_clauses = "\n".join(
+        f"            FOREACH (_ IN CASE WHEN '{label}' IN row.labels THEN [1] ELSE [] END | SET e:{label})"
+        for label in labels
+    )
+    
+    # MERGE by name and type under the Entity label, so it seeks the
+    # entity_name_type index instead of scanning every node
+    return f"""
+            UNWIND $rows as row
+            MERGE (e:Entity {{ name: row.name, type: row.type }})
+            ON CREATE SET e.observations = row.observations
+            ON MATCH SET e.observations = e.observations + [obs in row.observations WHERE NOT obs IN e.observations]
+            CALL db.create.setNodeVectorProperty(e, 'content_embedding', row.content_embedding)
+            CALL db.create.setNodeVectorProperty(e, 'observation_embedding', row.observation_embedding)
+            CALL db.create.setNodeVectorProperty(e, 'identity_embedding', row.identity_embedding)
+            SET e.indexed_at = datetime(), e.content_hash = row.content_hash
+            REMOVE e:Unindexed
+{label_clauses}
+            """
+
+@lru_cache(maxsize=1024)
+def _merge_relations_query(rel_type: str) -> str:
+    """UNWIND query merging $rows of relations of one type"""
+    # Subqueries keep the first match per row when names are duplicated
+    return f"""
+            UNWIND $rows as row
+            CALL {{
+                WITH row
+                MATCH (from:Entity {{name: row.source}})
+                RETURN from LIMIT 1
+            }}
+            CALL {{
+                WITH row
+                MATCH (to:Entity {{name: row.target}})
+                RETURN to LIMIT 1
+            }}
+            MERGE (from)-[r:{rel_type}]->(to)
+            CALL db.create.setRelationshipVectorProperty(r, 'context_embedding', row.context_embedding)
+            SET r.created_at = datetime()
+            """
+
+@lru_cache(maxsize=1024)
+def _delete_relations_query(rel_type: str) -> str:
+    """UNWIND query deleting $rows of relations of one type"""
+    return f"""
+            UNWIND $rows as row
+            CALL {{
+                WITH row
+                MATCH (source:Entity {{name: row.source}})
+                RETURN source LIMIT 1
+            }}
+            CALL {{
+                WITH row
+                MATCH (target:Entity {{name: row.target}})
+                RETURN target LIMIT 1
+            }}
+            MATCH (source)-[r:{rel_type}]->(target)
+            DELETE r
+            """
+
+# Shared tail for vector queries: expects (node, score) rows ordered by score.
+# Each node contributes at most 5 of its relations, the relation maps are
+# built once per relation rather than once per outer row, and shared edges
+# are deduplicated with a hashed DISTINCT.
+_NEIGHBOURHOOD_PROJECTION = """
+        // Get relations within 1 hop
+        CALL {
+            WITH node
+            MATCH (node)-[r]-(related:Entity)
+            WHERE related <> node
+            WITH r LIMIT 5
+            RETURN collect({
+                source: startNode(r).name,
+                target: endNode(r).name,
+                relationType: type(r)
+            }) as rels
+        }
+        
+        WITH collect({
+            name: node.name,
+            type: node.type, 
+            observations: node.observations,
+            score: score
+        }) as nodes,
+        collect(rels) as node_rels
+        
+        // Emit each distinct edge once (two hits often share an edge)
+        CALL {
+            WITH node_rels
+            UNWIND node_rels as rels
+            UNWIND rels as rel
+            RETURN collect(DISTINCT rel) as relations
+        }
+        
+        RETURN nodes, relations
+"""
+
+_SHOW_INDEXES = "SHOW INDEXES YIELD name"
+
+# One-time upgrade of graphs written before this schema, run when the content
+# vector index has to be created (a first start on it). Batched with
+# IN TRANSACTIONS, so these need an auto-commit session.run
+_BACKFILL_TRIGGER = "entity_content_embeddings"
+_BACKFILL_QUERIES = [
+    # Writes MERGE on :Entity, so unlabelled legacy nodes would be duplicated
+    ("unlabelled entities", """
+        MATCH (m) WHERE m.name IS NOT NULL AND m.type IS NOT NULL AND NOT m:Entity
+        CALL { WITH m SET m:Entity:Unindexed } IN TRANSACTIONS OF 1000 ROWS
+        """),
+    ("unembedded entities", """
+        MATCH (m:Entity) WHERE m.content_embedding IS NULL AND NOT m:Unindexed
+        CALL { WITH m SET m:Unindexed } IN TRANSACTIONS OF 1000 ROWS
+        """),
+]
+
+# Records pulled per worker-thread hop when streaming from a sync driver
+# (the driver's default fetch size)
+_STREAM_CHUNK = 1000
+
+# Query text is fixed per shape (index name and sizes are parameters) so Neo4j
+# reuses the cached plan instead of re-planning per search mode
+_VECTOR_QUERY = f"""
+        CALL db.index.vector.queryNodes($indexName, $limit, $embedding)
+        YIELD node, score
+        WHERE score >= $threshold
+        WITH node, score
+        ORDER BY score DESC
+
+        {_NEIGHBOURHOOD_PROJECTION}
+        """
+
+# Hybrid search probes every index; weights are baked in from config so the
+# text is still a single fixed query
+_HYBRID_PROBES = "\n            UNION ALL\n            ".join(
+    f"""CALL db.index.vector.queryNodes('{name}', $k, $embedding)
+            YIELD node, score
+            RETURN node, score * {weight} AS weighted"""
+    for name, weight in HYBRID_WEIGHTS.items()
+)
+
+_HYBRID_QUERY = f"""
+        CALL {{
+            {_HYBRID_PROBES}
+        }}
+        WITH node, max(weighted) AS score
+        WHERE score >= $threshold
+        WITH node, score
+        ORDER BY score DESC
+        LIMIT $limit
+
+        {_NEIGHBOURHOOD_PROJECTION}
+        """
+
+class _GraphBuilder:
+    """Accumulates one-row-per-entity records into a KnowledgeGraph
+    
+    Entities and relations are deduplicated as rows arrive, since an edge
+    between two matched entities shows up on both rows.
+    """
+    
+    def __init__(self):
+        self.entities = {}
+        self.relations = {}
+    
+    def add(self, record):
+        from .server import Entity, Relation
+        
+        name = record.get('name')
+        if name:
+            observations = record.get('observations') or []
+            self.entities.setdefault((name, record.get('type'), tuple(observations)), Entity(
+                name=name,
+                type=record.get('type'),
+                observations=observations
+            ))
+        
+        for rel in record.get('relations') or []:
+            key = (rel.get('source'), rel.get('target'), rel.get('relationType'))
+            if all(key) and key not in self.relations:
+                self.relations[key] = Relation(source=key[0], target=key[1], relationType=key[2])
+    
+    def build(self):
+        from .server import KnowledgeGraph
+        return KnowledgeGraph(entities=list(self.entities.values()), relations=list(self.relations.values()))
+
 class VectorEnabledNeo4jMemory:
-    def __init__(self, neo4j_driver, auto_migrate=True):
+    def __init__(self, neo4j_driver, auto_migrate=True, database=None):
+        """Accepts a sync Driver or an AsyncDriver
+        
+        With an AsyncDriver, queries are awaited directly and the caller must
+        await ensure_schema() once; a sync driver runs queries in worker
+        threads and creates the indexes here. Naming the database spares the
+        driver a home-database lookup on every query.
+        """
         self.neo4j_driver = neo4j_driver
+        self.database = database
+        self._async_driver = isinstance(neo4j_driver, neo4j.AsyncDriver)
         logger.info(f"Loading embedding model: {EMBEDDING_MODEL}")
         
         # Safe CUDA detection with fallback
         device = self._detect_device()
         logger.info(f"Using device: {device}")
         
-        self.encoder = SentenceTransformer(EMBEDDING_MODEL, device=device)
-        self.encoder.max_seq_length = 512  # Optimize for memory content
+        self.encoder = _get_encoder(device)
+        
+        # LRU of recent embeddings; encoding runs in worker threads, hence the locks
+        self._embedding_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._forward_lock = _forward_lock  # shared along with the encoder
+        
+        # Uncased tokenizers (BGE's included) make "Great" and "great" the same input
+        self._uncased = getattr(getattr(self.encoder, 'tokenizer', None), 'do_lower_case', False) is True
+        
+        # Optional persistent layer below the LRU
+        self._disk_cache = None
+        if EMBEDDING_DISK_CACHE:
+            try:
+                self._disk_cache = _DiskEmbeddingCache(os.path.expanduser(EMBEDDING_DISK_CACHE))
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not open embedding cache {EMBEDDING_DISK_CACHE} ({e}), continuing without it")
+        
+        # Optional worker pool so CPU encoding runs beside the event loop
+        self._pool = None
+        if ENCODER_WORKERS > 0 and device == 'cpu':
+            logger.info(f"Starting {ENCODER_WORKERS} encoder worker processes")
+            # Spawned, not forked: the parent already holds torch thread pools and the model
+            self._pool = ProcessPoolExecutor(
+                max_workers=ENCODER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
         
-        self.create_fulltext_index()
-        self._ensure_vector_indexes()
+        if not self._async_driver:
+            self._create_schema(neo4j_driver, database)
         
         # Schedule migration check if event loop is running
-        if auto_migrate:
+        if auto_migrate and self._async_driver:
+            # ensure_schema() starts it, once the backfill has tagged legacy nodes
+            self._migration_pending = True
+        elif auto_migrate:
             try:
                 # Check if there's an event loop and schedule migration
                 loop = asyncio.get_event_loop()
@@ -72,69 +514,298 @@ class VectorEnabledNeo4jMemory:
             logger.warning(f"CUDA detection failed ({e}), falling back to CPU")
             return 'cpu'
 
-    def create_fulltext_index(self):
-        """Create fulltext index for fallback search"""
-        try:
-            query = """
+    @staticmethod
+    def _schema_queries() -> List[tuple]:
+        """(name, query) pairs for the fulltext, vector and range indexes"""
+        queries = [("search", """
             CREATE FULLTEXT INDEX search IF NOT EXISTS 
             FOR (m:Entity) ON EACH [m.name, m.type, m.observations]
-            """
-            self.neo4j_driver.execute_query(query)
-            logger.info("Created fulltext search index")
-        except neo4j.exceptions.ClientError as e:
-            if "An index with this name already exists" in str(e):
-                logger.info("Fulltext search index already exists")
-            else:
-                raise e
-
-    def _ensure_vector_indexes(self):
-        """Create all necessary vector indexes"""
+            """)]
+        
+        # Quantization is only spelled out when configured, since servers
+        # before 5.23 reject the option
+        quantization = ""
+        if VECTOR_INDEX_QUANTIZATION:
+            enabled = VECTOR_INDEX_QUANTIZATION.lower() in ("1", "true", "yes")
+            quantization = f",\n                    `vector.quantization.enabled`: {str(enabled).lower()}"
+        
         for index_config in VECTOR_INDEXES:
-            self._create_vector_index(**index_config)
-
-    def _create_vector_index(self, name: str, label: str, property: str):
-        """Create a single vector index"""
-        try:
-            query = f"""
-            CREATE VECTOR INDEX {name} IF NOT EXISTS
-            FOR (m:{label}) 
-            ON m.{property}
+            queries.append((index_config['name'], f"""
+            CREATE VECTOR INDEX {index_config['name']} IF NOT EXISTS
+            FOR (m:{index_config['label']}) 
+            ON m.{index_config['property']}
             OPTIONS {{
                 indexConfig: {{
                     `vector.dimensions`: {EMBEDDING_DIMENSIONS},
-                    `vector.similarity_function`: 'cosine'
+                    `vector.similarity_function`: 'cosine'{quantization}
                 }}
             }}
-            """
-            self.neo4j_driver.execute_query(query)
-            logger.info(f"Created vector index: {name}")
-        except neo4j.exceptions.ClientError as e:
-            if "already exists" in str(e):
-                logger.info(f"Vector index {name} already exists")
-            else:
-                logger.error(f"Failed to create vector index {name}: {e}")
-                raise e
+            """))
+        
+        # Range indexes so name lookups don't scan every Entity
+        for index_config in RANGE_INDEXES:
+            queries.append((index_config['name'], f"""
+            CREATE INDEX {index_config['name']} IF NOT EXISTS
+            FOR (m:{index_config['label']})
+            ON ({', '.join(f"m.{prop}" for prop in index_config['properties'])})
+            """))
+        
+        return queries
 
-    def _generate_embeddings(self, entity) -> Dict[str, List[float]]:
-        """Generate multiple embeddings for different search contexts"""
+    @staticmethod
+    def _schema_error(name: str, error: neo4j.exceptions.ClientError):
+        """Tolerate an index that already exists under another definition, re-raise anything else"""
+        if "already exists" in str(error):
+            logger.info(f"Index {name} already exists")
+        else:
+            logger.error(f"Failed to create index {name}: {error}")
+            raise error
+
+    @staticmethod
+    def _missing_schema_queries(records) -> List[tuple]:
+        """_schema_queries minus the indexes named in SHOW INDEXES records"""
+        existing = {record["name"] for record in records}
+        return [(name, query) for name, query in VectorEnabledNeo4jMemory._schema_queries() if name not in existing]
+
+    @staticmethod
+    def _create_schema(driver, database=None):
+        """Create missing indexes through a sync driver (no model or instance needed)"""
+        # One listing round-trip instead of a DDL statement per index on every start
+        existing = driver.execute_query(_SHOW_INDEXES, database_=database).records
+        missing = VectorEnabledNeo4jMemory._missing_schema_queries(existing)
+        for name, query in missing:
+            try:
+                driver.execute_query(query, database_=database)
+                logger.info(f"Ensured index: {name}")
+            except neo4j.exceptions.ClientError as e:
+                VectorEnabledNeo4jMemory._schema_error(name, e)
+        
+        if any(name == _BACKFILL_TRIGGER for name, _ in missing):
+            with driver.session(database=database) as session:
+                for name, query in _BACKFILL_QUERIES:
+                    session.run(query).consume()
+                    logger.info(f"Backfilled {name}")
+
+    async def ensure_schema(self):
+        """Create missing indexes; async drivers can't do this from the constructor, so await it once after"""
+        existing = (await self._execute(_SHOW_INDEXES)).records
+        missing = self._missing_schema_queries(existing)
+        for name, query in missing:
+            try:
+                await self._execute(query)
+                logger.info(f"Ensured index: {name}")
+            except neo4j.exceptions.ClientError as e:
+                self._schema_error(name, e)
         
-        # 1. Full content embedding (name + type + all observations)
-        full_content = f"{entity.name} is a {entity.type}. {' '.join(entity.observations)}"
-        content_embedding = self.encoder.encode(full_content).tolist()
+        if any(name == _BACKFILL_TRIGGER for name, _ in missing):
+            for name, query in _BACKFILL_QUERIES:
+                await self._run_auto_commit(query)
+                logger.info(f"Backfilled {name}")
         
-        # 2. Observation-only embedding (for semantic observation search)
-        observation_content = ' '.join(entity.observations) if entity.observations else entity.name
-        observation_embedding = self.encoder.encode(observation_content).tolist()
+        # Migration waits for the schema (and backfill) with an AsyncDriver
+        if self._migration_pending:
+            self._migration_pending = False
+            self._migration_task = asyncio.create_task(self.ensure_all_indexed())
+
+    async def _run_auto_commit(self, query: str):
+        """Run a query in an auto-commit transaction, as CALL ... IN TRANSACTIONS requires"""
+        if self._async_driver:
+            async with self.neo4j_driver.session(database=self.database) as session:
+                await (await session.run(query)).consume()
+            return
+        
+        def run():
+            with self.neo4j_driver.session(database=self.database) as session:
+                session.run(query).consume()
+        await asyncio.to_thread(run)
+
+    def close(self):
+        """Shut down the encoder worker processes, if any; the driver stays with its owner"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _compose_texts(self, entity) -> List[str]:
+        """Build the content, observation and identity texts for an entity"""
+        # Joined once and shared by the first two texts
+        observations = ' '.join(entity.observations)
         
-        # 3. Entity identity embedding (name + type only)
+        # 1. Full content (name + type + all observations)
+        full_content = f"{entity.name} is a {entity.type}. {observations}"
+        
+        # 2. Observation-only (for semantic observation search)
+        observation_content = observations if entity.observations else entity.name
+        
+        # 3. Entity identity (name + type only)
         identity_content = f"{entity.name} ({entity.type})"
-        identity_embedding = self.encoder.encode(identity_content).tolist()
         
-        return {
-            "content_embedding": content_embedding,
-            "observation_embedding": observation_embedding, 
-            "identity_embedding": identity_embedding
-        }
+        return [full_content, observation_content, identity_content]
+
+    def _generate_embeddings(self, entity) -> Dict[str, np.ndarray]:
+        """Generate multiple embeddings for different search contexts"""
+        # One forward pass for all three texts instead of three
+        vectors = self._encode_entity_texts(self._compose_texts(entity))
+        return self._split_embeddings(vectors)[0]
+
+    def _batch_texts(self, entities: List) -> List[str]:
+        """Flatten the three texts of every entity into one list (3 rows per entity)"""
+        return [text for entity in entities for text in self._compose_texts(entity)]
+
+    def _encode_entity_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode a _batch_texts list in two length tiers
+        
+        Identity rows are short, so they get their own encoder call with a
+        lower token cap instead of sharing batches with long content texts.
+        Each distinct text is encoded once per tier.
+        """
+        identity_rows = np.zeros(len(texts), dtype=bool)
+        identity_rows[2::3] = True
+        
+        vectors = np.empty((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+        for rows, max_seq_length in ((~identity_rows, MAX_SEQ_LENGTH), (identity_rows, IDENTITY_MAX_SEQ_LENGTH)):
+            if not rows.any():
+                continue
+            uniq, inverse = np.unique(np.array(texts)[rows], return_inverse=True)
+            encoded = self._encode_texts(uniq.tolist(), max_seq_length=max_seq_length)
+            vectors[rows] = encoded[inverse.reshape(-1)]
+        return vectors
+
+    def _split_embeddings(self, vectors: np.ndarray) -> List[Dict[str, np.ndarray]]:
+        """Turn a (3 * n, dim) matrix from _batch_texts back into per-entity dicts"""
+        return [
+            {
+                "content_embedding": vectors[i],
+                "observation_embedding": vectors[i + 1],
+                "identity_embedding": vectors[i + 2]
+            }
+            for i in range(0, len(vectors), 3)
+        ]
+
+    def _forward(self, texts: Union[str, List[str]], max_seq_length: int) -> np.ndarray:
+        """Run the encoder without autograd bookkeeping"""
+        with self._forward_lock:
+            return _encode_with_length(self.encoder, texts, max_seq_length, BATCH_SIZE * 3)
+
+    def _encode_texts(self, texts: Union[str, List[str]], max_seq_length: int = MAX_SEQ_LENGTH) -> np.ndarray:
+        """Encode a list of texts (or a single text) in one batched encoder call
+        
+        Texts seen recently are served from the LRU cache, then from the disk
+        cache if one is configured; only the misses go through the encoder.
+        Texts the tokenizer can't tell apart share one entry.
+        """
+        if EMBEDDING_CACHE_SIZE <= 0 and self._disk_cache is None:
+            return _as_vector(self._forward(texts, max_seq_length))
+        
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        
+        keys, found, misses = self._lookup(texts, max_seq_length)
+        vectors = self._forward(list(misses.values()), max_seq_length) if misses else None
+        vectors = self._assemble(keys, found, misses, vectors)
+        return vectors[0] if single else vectors
+
+    def _lookup(self, texts: List[str], max_seq_length: int) -> Tuple[List[bytes], Dict, Dict]:
+        """Cache keys for texts, the vectors already cached, and the {key: text} misses
+        
+        Misses are unique per key, so each distinct text is encoded once.
+        """
+        keys = [_text_key(self._cache_text(text), max_seq_length) for text in texts]
+        
+        found = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._embedding_cache:
+                    self._embedding_cache.move_to_end(key)
+                    found[key] = self._embedding_cache[key]
+        
+        if self._disk_cache is not None:
+            stored = self._disk_cache.get_many([key for key in dict.fromkeys(keys) if key not in found])
+            found.update(stored)
+            self._remember(stored)
+        
+        misses = {key: text for text, key in zip(texts, keys) if key not in found}
+        return keys, found, misses
+
+    def _assemble(self, keys: List[bytes], found: Dict, misses: Dict, vectors: Optional[np.ndarray]) -> np.ndarray:
+        """Cache the encoded misses and stack every key's vector in order"""
+        if misses:
+            vectors = _as_vector(vectors)
+            # Fresh vectors are returned at full precision; only the cached copies are float16
+            found.update(zip(misses, vectors))
+            self._store(dict(zip(misses, vectors.astype(np.float16))))
+        return _as_vector(np.stack([found[key] for key in keys]))
+
+    def _cache_text(self, text: str) -> str:
+        """Text as the tokenizer sees it: whitespace runs collapse, and case folds for uncased models"""
+        text = " ".join(text.split())
+        return text.lower() if self._uncased else text
+
+    def _store(self, vectors: Dict[bytes, np.ndarray]):
+        """Add float16 vectors to the LRU and, if configured, the disk cache"""
+        self._remember(vectors)
+        if self._disk_cache is not None:
+            self._disk_cache.put_many(vectors)
+
+    def _remember(self, vectors: Dict[bytes, np.ndarray]):
+        """Add vectors to the LRU, evicting the least recently used"""
+        if EMBEDDING_CACHE_SIZE <= 0 or not vectors:
+            return
+        with self._cache_lock:
+            self._embedding_cache.update(vectors)
+            while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+
+    async def _encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Run the encoder in a worker thread so the event loop keeps serving other calls"""
+        return await asyncio.to_thread(self._encode_texts, texts)
+
+    async def _embed_batches(self, entities: List):
+        """Yield (batch, embeddings) pairs in BATCH_SIZE chunks.
+        
+        Each batch is a single encoder call. With a worker pool all batches
+        are submitted up front, so later batches keep encoding while earlier
+        ones are written to Neo4j; only cache misses are sent to the workers.
+        """
+        batches = [entities[i:i+BATCH_SIZE] for i in range(0, len(entities), BATCH_SIZE)]
+        
+        if self._pool is None:
+            for n, batch in enumerate(batches, 1):
+                vectors = await asyncio.to_thread(self._encode_entity_texts, self._batch_texts(batch))
+                logger.info(f"Generated embeddings for batch {n}")
+                yield batch, self._split_embeddings(vectors)
+            return
+        
+        tiered = [
+            ((texts[0::3] + texts[1::3], MAX_SEQ_LENGTH), (texts[2::3], IDENTITY_MAX_SEQ_LENGTH))
+            for texts in map(self._batch_texts, batches)
+        ]
+        
+        # Check the caches first, so cache hits and repeated texts never reach a worker
+        lookups = await asyncio.to_thread(
+            lambda: [[self._lookup(texts, length) for texts, length in tiers] for tiers in tiered]
+        )
+        
+        loop = asyncio.get_running_loop()
+        futures = [
+            [
+                loop.run_in_executor(self._pool, _encode_batch, list(misses.values()), length) if misses else None
+                for (_, _, misses), (_, length) in zip(batch_lookups, tiers)
+            ]
+            for batch_lookups, tiers in zip(lookups, tiered)
+        ]
+        
+        for n, (batch, batch_lookups, batch_futures) in enumerate(zip(batches, lookups, futures), 1):
+            encoded = [None if future is None else await future for future in batch_futures]
+            long_vectors, identity_vectors = await asyncio.to_thread(
+                lambda: [self._assemble(*lookup, vectors) for lookup, vectors in zip(batch_lookups, encoded)]
+            )
+            vectors = np.empty((3 * len(batch), EMBEDDING_DIMENSIONS), dtype=np.float32)
+            vectors[0::3] = long_vectors[:len(batch)]
+            vectors[1::3] = long_vectors[len(batch):]
+            vectors[2::3] = identity_vectors
+            logger.info(f"Generated embeddings for batch {n}")
+            yield batch, self._split_embeddings(vectors)
 
     def _sanitize_labels(self, labels: Optional[List[str]]) -> List[str]:
         """Sanitize and CamelCase labels according to Neo4j rules"""
@@ -144,45 +815,184 @@ class VectorEnabledNeo4jMemory:
         if len(labels) > 3:
             raise ValueError("Maximum 3 labels allowed")
         
-        sanitized = []
-        for label in labels[:3]:  # Max 3 additional labels
-            # Remove special characters and split on common separators
-            cleaned = re.sub(r'[^a-zA-Z0-9_\s]', '', str(label))
-            words = re.split(r'[\s_]+', cleaned)
-            
-            # CamelCase: first letter of each word capitalized, rest lowercase
-            camel_cased = ''.join(word.capitalize() for word in words if word)
-            
-            # Ensure it starts with a letter (Neo4j requirement)
-            if camel_cased and camel_cased[0].isalpha():
-                sanitized.append(camel_cased)
-            elif camel_cased:
-                # If starts with number/underscore, prepend 'Label'
-                sanitized.append(f"Label{camel_cased}")
-        
-        return sanitized
+        # Max 3 additional labels; results are cached since the same labels recur
+        sanitized = (_sanitize_label(str(label)) for label in labels[:3])
+        return [label for label in sanitized if label]
 
-    async def create_entities(self, entities: List) -> List:
-        """Enhanced entity creation with automatic embedding generation"""
+    async def _execute(self, query: str, *params):
+        """Run a query without stalling the event loop
         
-        # Run pending migration if needed
+        An AsyncDriver is awaited directly; a sync driver's blocking call runs
+        on a worker thread (its connection pool is thread-safe). Either way
+        independent queries can be gathered and their round-trips overlap.
+        """
+        if self._async_driver:
+            return await self.neo4j_driver.execute_query(query, *params, database_=self.database)
+        return await asyncio.to_thread(
+            self.neo4j_driver.execute_query, query, *params, database_=self.database
+        )
+
+    async def _run_pending_migration(self):
+        """Run the startup migration deferred to the first write, if any"""
         if hasattr(self, '_migration_pending') and self._migration_pending:
             logger.info("Running pending migration on first entity creation")
             await self.ensure_all_indexed()
             self._migration_pending = False
+
+    async def _execute_in_transaction(self, statements: List[Tuple[str, Dict]]):
+        """Run (query, params) statements in order inside one write transaction
+        
+        The driver retries the whole transaction on transient errors, so
+        either every statement is committed or none is.
+        """
+        if self._async_driver:
+            async def work(tx):
+                for query, params in statements:
+                    await (await tx.run(query, params)).consume()
+            async with self.neo4j_driver.session(database=self.database) as session:
+                await session.execute_write(work)
+            return
+        
+        def work(tx):
+            for query, params in statements:
+                tx.run(query, params).consume()
+        def run():
+            with self.neo4j_driver.session(database=self.database) as session:
+                session.execute_write(work)
+        await asyncio.to_thread(run)
+
+    async def create_entities(self, entities: List) -> List:
+        """Enhanced entity creation with automatic embedding generation"""
+        
+        # Run pending migration if needed
+        await self._run_pending_migration()
         
         if not entities:
             return entities
+        
+        changed = await self._skip_unchanged(self._merge_duplicates(entities))
+        if not changed:
+            logger.info(f"All {len(entities)} entities already stored, nothing to write")
+            return entities
             
-        # Generate embeddings in batches for efficiency
-        batch_embeddings = []
-        for i in range(0, len(entities), BATCH_SIZE):
-            batch = entities[i:i+BATCH_SIZE]
-            embeddings = [self._generate_embeddings(entity) for entity in batch]
-            batch_embeddings.extend(embeddings)
-            logger.info(f"Generated embeddings for batch {i//BATCH_SIZE + 1}")
+        # Write each batch as soon as its embeddings are ready, without waiting
+        # for earlier writes; a batch sharing a (name, type) with a pending one
+        # waits for it, since concurrent MERGEs on one key can both create
+        pending = []
+        try:
+            async for batch, batch_embeddings in self._embed_batches(changed):
+                keys = {(entity.name, entity.type) for entity in batch}
+                after = [task for task_keys, task in pending if task_keys & keys]
+                pending.append((keys, asyncio.create_task(self._write_after(after, batch, batch_embeddings))))
+            await asyncio.gather(*(task for _, task in pending))
+        except BaseException:
+            # Don't leave writes running in the background after the call has failed
+            tasks = [task for _, task in pending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        logger.info(f"Created {len(entities)} entities with embeddings")
+        return entities
+
+    async def _skip_unchanged(self, entities: List) -> List:
+        """Drop entities whose observations and labels are already stored, so they aren't re-encoded
+        
+        One UNWIND lookup on the (name, type) index covers the whole call. An
+        entity is kept if any matching node lacks one of its observations or
+        labels, or still has stale embeddings.
+        """
+        result = await self._execute("""
+            UNWIND $keys as key
+            MATCH (e:Entity {name: key.name, type: key.type})
+            RETURN e.name as name, e.type as type, e.observations as observations,
+                   labels(e) as labels, e:Unindexed as unindexed
+            """, {"keys": [{"name": entity.name, "type": entity.type} for entity in entities]})
+        
+        stored = defaultdict(list)
+        for record in result.records:
+            stored[(record["name"], record["type"])].append(record)
+        
+        changed = []
+        for entity in entities:
+            labels = self._sanitize_labels(entity.labels)
+            nodes = stored.get((entity.name, entity.type))
+            unchanged = (
+                nodes
+                # Labels given but none valid must still reach the write to be rejected
+                and (entity.labels is None or labels)
+                and all(
+                    not node["unindexed"]
+                    and set(entity.observations) <= set(node["observations"] or [])
+                    and set(labels) <= set(node["labels"])
+                    for node in nodes
+                )
+            )
+            if not unchanged:
+                changed.append(entity)
+        return changed
+
+    @staticmethod
+    def _merge_duplicates(entities: List) -> List:
+        """Fold entities repeating a (name, type) into the first one, so each key is encoded and merged once
+        
+        Observations and labels are unioned in order, as the MERGE would do
+        across separate writes. A duplicate whose labels would take the union
+        past 3 stays separate and is written after it.
+        """
+        first_index = {}
+        merged = []
+        for entity in entities:
+            key = (entity.name, entity.type)
+            if key in first_index:
+                first = merged[first_index[key]]
+                labels = list(dict.fromkeys((first.labels or []) + (entity.labels or [])))
+                if len(labels) <= 3:
+                    merged[first_index[key]] = first.model_copy(update={
+                        "observations": first.observations + [obs for obs in entity.observations if obs not in first.observations],
+                        "labels": labels if first.labels is not None or entity.labels is not None else None
+                    })
+                    continue
+            first_index[key] = len(merged)
+            merged.append(entity)
+        return merged
+
+    async def _write_after(self, tasks: List[asyncio.Task], entities: List, batch_embeddings: List[Dict[str, np.ndarray]]):
+        """Write a batch once the given earlier writes have finished"""
+        if tasks:
+            await asyncio.gather(*tasks)
+        await self._write_entities(entities, batch_embeddings)
+
+    async def batch_writes(self, entities: Optional[List] = None, relations: Optional[List] = None):
+        """Create entities, then relations between them, in one write transaction
+        
+        Meant for multi-step setup: one BEGIN/COMMIT instead of one per entity
+        batch and relation type, and nothing is written if any step fails.
+        Batches are written one after another rather than concurrently.
+        """
+        await self._run_pending_migration()
+        
+        statements = []
+        if entities:
+            changed = await self._skip_unchanged(self._merge_duplicates(entities))
+            async for batch, batch_embeddings in self._embed_batches(changed):
+                statements.append(self._entity_write(batch, batch_embeddings))
+        if relations:
+            statements.extend(await self._relation_writes(relations))
+        
+        if statements:
+            await self._execute_in_transaction(statements)
+        logger.info(f"Wrote {len(entities or [])} entities and {len(relations or [])} relations in one transaction")
+
+    async def _write_entities(self, entities: List, batch_embeddings: List[Dict[str, np.ndarray]]):
+        """Merge a batch of entities and their embeddings into Neo4j with one UNWIND query"""
+        await self._execute(*self._entity_write(entities, batch_embeddings))
 
-        # Create entities individually with intelligent merging
+    def _entity_write(self, entities: List, batch_embeddings: List[Dict[str, np.ndarray]]) -> Tuple[str, Dict]:
+        """Build the UNWIND merge query and its parameters for a batch of entities"""
+        rows = []
+        batch_labels = []
+        
         for entity, embeddings in zip(entities, batch_embeddings):
             # Get labels and sanitize them (required for user-created entities, optional for internal)
             additional_labels = self._sanitize_labels(entity.labels)
@@ -191,77 +1001,76 @@ class VectorEnabledNeo4jMemory:
             if hasattr(entity, 'labels') and entity.labels is not None and not additional_labels:
                 raise ValueError("At least one valid label is required for user-created entities")
             
-            # MERGE by name and type only, then add Entity base label
-            merge_query = """
-            MERGE (e { name: $name, type: $type })
-            ON CREATE SET e:Entity, e.observations = $observations
-            ON MATCH SET e:Entity, e.observations = e.observations + [obs in $observations WHERE NOT obs IN e.observations]
-            SET e.content_embedding = $content_embedding
-            SET e.observation_embedding = $observation_embedding
-            SET e.identity_embedding = $identity_embedding
-            SET e.indexed_at = datetime()
-            """
-            
-            # Prepare parameters
-            params = {
+            rows.append({
                 "name": entity.name,
                 "type": entity.type,
                 "observations": entity.observations,
-                **embeddings
-            }
-            
-            self.neo4j_driver.execute_query(merge_query, params)
-            
-            # Add additional labels separately 
-            if additional_labels:
-                for label in additional_labels:
-                    # Dynamic label addition
-                    label_query = f"MATCH (e {{name: $name}}) SET e:{label}"
-                    self.neo4j_driver.execute_query(label_query, {"name": entity.name})
-        logger.info(f"Created {len(entities)} entities with embeddings")
-        return entities
+                "labels": additional_labels,
+                "content_hash": _content_hash(self._compose_texts(entity)),
+                **{key: _as_param(vector) for key, vector in embeddings.items()}
+            })
+            batch_labels.extend(additional_labels)
+        
+        # Sorted so batches with the same labels share one query text
+        merge_query = _merge_entities_query(tuple(sorted(set(batch_labels))))
+        return merge_query, {"rows": rows}
 
     async def create_relations(self, relations: List) -> List:
         """Enhanced relation creation with context embeddings"""
         
-        for relation in relations:
-            # Generate context embedding for relationship
-            context_text = f"{relation.source} {relation.relationType} {relation.target}"
-            context_embedding = self.encoder.encode(context_text).tolist()
-            
+        if not relations:
+            return relations
+        
+        writes = await self._relation_writes(relations)
+        
+        # Types touch disjoint relationships, so their writes can run concurrently
+        await asyncio.gather(*(self._execute(query, params) for query, params in writes))
+        
+        logger.info(f"Created {len(relations)} relations with embeddings")
+        return relations
+
+    async def _relation_writes(self, relations: List) -> List[Tuple[str, Dict]]:
+        """Build one UNWIND merge query and its parameters per relationship type"""
+        # Generate context embeddings for every relationship in one encoder call
+        context_texts = [f"{relation.source} {relation.relationType} {relation.target}" for relation in relations]
+        context_embeddings = await self._encode(context_texts)
+        
+        # Relationship types can't be parameterized, so write one UNWIND per type
+        groups = defaultdict(list)
+        for relation, context_embedding in zip(relations, context_embeddings):
             # Sanitize relation type for Cypher (remove special chars, spaces)
-            safe_rel_type = re.sub(r'[^a-zA-Z0-9_]', '_', relation.relationType)
-            
-            # Dynamic query with relation type (can't parameterize relationship types in Neo4j)
-            query = f"""
-            MATCH (from:Entity {{name: $source}})
-            WITH from LIMIT 1
-            MATCH (to:Entity {{name: $target}})
-            WITH from, to LIMIT 1
-            MERGE (from)-[r:{safe_rel_type}]->(to)
-            SET r.context_embedding = $context_embedding
-            SET r.created_at = datetime()
-            """
-            
-            self.neo4j_driver.execute_query(query, {
+            safe_rel_type = _safe_rel_type(relation.relationType)
+            groups[safe_rel_type].append({
                 "source": relation.source,
                 "target": relation.target,
-                "context_embedding": context_embedding
+                "context_embedding": _as_param(context_embedding)
             })
         
-        logger.info(f"Created {len(relations)} relations with embeddings")
-        return relations
+        return [
+            (_merge_relations_query(safe_rel_type), {"rows": rows})
+            for safe_rel_type, rows in groups.items()
+        ]
+
+    async def _encode_query(self, query: str) -> np.ndarray:
+        """Encode a search query into a single vector"""
+        return await self._encode(query)
 
     async def vector_search(
         self, 
-        query: str, 
+        query: Optional[str], 
+        *,
+        query_embedding: Optional[np.ndarray] = None,
         mode: str = "content",
         limit: int = 10,
         threshold: float = SIMILARITY_THRESHOLD
     ):
-        """Advanced vector search with multiple modes"""
+        """Advanced vector search with multiple modes
         
-        query_embedding = self.encoder.encode(query).tolist()
+        Pass query_embedding to reuse a vector the caller already computed.
+        """
+        
+        if query_embedding is None:
+            query_embedding = await self._encode_query(query)
         
         # Choose embedding field based on search mode
         embedding_property = SEARCH_MODES.get(mode, "content_embedding")
@@ -274,41 +1083,35 @@ class VectorEnabledNeo4jMemory:
         }
         index_name = index_mapping.get(mode, "entity_content_embeddings")
         
-        vector_query = f"""
-        CALL db.index.vector.queryNodes(
-            '{index_name}', 
-            $limit, 
-            $embedding
-        )
-        YIELD node, score
-        WHERE score >= $threshold
-        WITH node, score
-        ORDER BY score DESC
-        
-        // Get related entities within 1 hop
-        OPTIONAL MATCH (node)-[r]-(related:Entity)
-        WHERE id(related) <> id(node)
+        result = await self._execute(_VECTOR_QUERY, {
+            "indexName": index_name,
+            "embedding": _as_param(query_embedding),
+            "limit": limit * 2,  # Get more for filtering
+            "threshold": threshold
+        })
         
-        WITH node, score, 
-             collect(DISTINCT related)[0..5] as related_nodes,
-             collect(DISTINCT r)[0..10] as related_rels
+        return self._process_vector_results(result)
+
+    async def hybrid_search(
+        self,
+        query: Optional[str],
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        limit: int = 10,
+        threshold: float = SIMILARITY_THRESHOLD
+    ):
+        """Search all three vector indexes in a single round-trip
         
-        RETURN collect({{
-            name: node.name,
-            type: node.type, 
-            observations: node.observations,
-            score: score
-        }}) as nodes,
-        collect(DISTINCT {{
-            source: startNode(related_rels[0]).name,
-            target: endNode(related_rels[0]).name, 
-            relationType: type(related_rels[0])
-        }}) as relations
+        Each index score is weighted by HYBRID_WEIGHTS and a node keeps its best score.
         """
         
-        result = self.neo4j_driver.execute_query(vector_query, {
-            "embedding": query_embedding,
-            "limit": limit * 2,  # Get more for filtering
+        if query_embedding is None:
+            query_embedding = await self._encode_query(query)
+        
+        result = await self._execute(_HYBRID_QUERY, {
+            "embedding": _as_param(query_embedding),
+            "k": limit * 2,  # Get more per index before merging
+            "limit": limit,
             "threshold": threshold
         })
         
@@ -353,88 +1156,172 @@ class VectorEnabledNeo4jMemory:
         words = query.split()
         
         # Short, specific queries → try exact match first
-        if len(words) <= 2 and not any(q in query_lower for q in ['what', 'how', 'why']):
+        if len(words) <= 2 and not _QUESTION_WORD_RE.search(query_lower):
             exact_result = await self.find_nodes(words)
             if exact_result.entities:
                 return exact_result
         
+        # Encode once and reuse for whichever route is taken
+        query_embedding = await self._encode_query(query)
+        
         # Question-based queries → content search
-        if any(q in query_lower for q in ['what is', 'who is', 'tell me about', 'explain']):
-            return await self.vector_search(query, mode="content", limit=limit)
+        if _QUESTION_RE.search(query_lower):
+            return await self.vector_search(query, query_embedding=query_embedding, mode="content", limit=limit)
         
         # Behavioral/observational queries → observation search  
-        if any(q in query_lower for q in ['does', 'can', 'did', 'involved in', 'related to']):
-            return await self.vector_search(query, mode="observations", limit=limit)
+        if _BEHAVIOUR_RE.search(query_lower):
+            return await self.vector_search(query, query_embedding=query_embedding, mode="observations", limit=limit)
         
-        # Default: hybrid content search
-        return await self.vector_search(query, mode="content", limit=limit)
+        # Ambiguous queries → probe every index at once
+        return await self.hybrid_search(query, query_embedding=query_embedding, limit=limit)
+
+    def _run_iter(self, query: str, params: Optional[Dict[str, Any]] = None):
+        """Yield records as they arrive from a sync session instead of materializing the result"""
+        with self.neo4j_driver.session(database=self.database) as session:
+            yield from session.run(query, params or {})
+
+    async def _stream(self, query: str, params: Optional[Dict[str, Any]] = None):
+        """Async iterator over records as they arrive, for either driver"""
+        if self._async_driver:
+            async with self.neo4j_driver.session(database=self.database) as session:
+                result = await session.run(query, params or {})
+                async for record in result:
+                    yield record
+        else:
+            # Fetches block, so records are pulled in chunks on a worker thread
+            records = self._run_iter(query, params)
+            try:
+                while chunk := await asyncio.to_thread(lambda: list(islice(records, _STREAM_CHUNK))):
+                    for record in chunk:
+                        yield record
+            finally:
+                # Closing ends the session, which may consume the rest of the result
+                await asyncio.to_thread(records.close)
+
+    async def _query_graph(self, query: str, params: Optional[Dict[str, Any]] = None):
+        """Run a one-row-per-entity query and build the KnowledgeGraph as rows stream in"""
+        if self._async_driver:
+            graph = _GraphBuilder()
+            async for record in self._stream(query, params):
+                graph.add(record)
+            return graph.build()
+        return await asyncio.to_thread(self._process_fulltext_results, self._run_iter(query, params))
 
     # Migration methods
     async def migrate_existing_memories(self):
-        """Add embeddings to existing memories that lack them"""
+        """Add embeddings to existing memories that lack them
+        
+        Records are streamed from a session and embedded as each batch fills,
+        so the unindexed set is never held in memory at once.
+        """
+        from .server import Entity
         
-        # Find unindexed entities
+        # Find unindexed entities (no ORDER BY, so the server can stream rows)
         query = """
-        MATCH (m:Entity)
-        WHERE m.content_embedding IS NULL
+        MATCH (m:Unindexed)
         RETURN m.name as name, m.type as type, m.observations as observations
-        ORDER BY m.name
         """
         
-        result = self.neo4j_driver.execute_query(query)
-        unindexed = []
+        migrated = 0
+        batch = []
         
-        for record in result.records:
-            from .server import Entity
-            entity = Entity(
+        async for record in self._stream(query):
+            batch.append(Entity(
                 name=record["name"],
                 type=record["type"], 
                 observations=record["observations"] or []
-            )
-            unindexed.append(entity)
-        
-        if unindexed:
-            logger.info(f"Migrating {len(unindexed)} unindexed memories...")
+            ))
             
-            # Process in batches
-            for i in range(0, len(unindexed), BATCH_SIZE):
-                batch = unindexed[i:i+BATCH_SIZE]
+            if len(batch) == BATCH_SIZE:
                 await self._update_embeddings_batch(batch)
-                logger.info(f"Migrated batch {i//BATCH_SIZE + 1}")
+                migrated += len(batch)
+                logger.info(f"Migrated batch {migrated // BATCH_SIZE}")
+                batch = []
+        
+        if batch:
+            await self._update_embeddings_batch(batch)
+            migrated += len(batch)
+        
+        if migrated:
+            logger.info(f"Migrated {migrated} unindexed memories")
 
     async def _update_embeddings_batch(self, entities: List):
         """Update embeddings for existing entities"""
-        updates = []
+        # Common names and short bios repeat across entities; each distinct text is encoded once
+        texts = self._batch_texts(entities)
+        unique_count = len(set(texts))
+        logger.info(f"Encoding {unique_count} unique texts out of {len(texts)} ({unique_count / len(texts):.0%})")
+        vectors = await asyncio.to_thread(self._encode_entity_texts, texts)
         
-        for entity in entities:
-            embeddings = self._generate_embeddings(entity)
-            updates.append({
+        updates = [
+            {
                 "name": entity.name,
-                **embeddings
-            })
+                "type": entity.type,
+                "content_hash": _content_hash(self._compose_texts(entity)),
+                **{key: _as_param(vector) for key, vector in embeddings.items()}
+            }
+            for entity, embeddings in zip(entities, self._split_embeddings(vectors))
+        ]
         
         query = """
         UNWIND $updates as update
-        MATCH (m:Entity {name: update.name})
-        SET m.content_embedding = update.content_embedding
-        SET m.observation_embedding = update.observation_embedding  
-        SET m.identity_embedding = update.identity_embedding
-        SET m.indexed_at = datetime()
+        MATCH (m:Entity {name: update.name, type: update.type})
+        CALL db.create.setNodeVectorProperty(m, 'content_embedding', update.content_embedding)
+        CALL db.create.setNodeVectorProperty(m, 'observation_embedding', update.observation_embedding)
+        CALL db.create.setNodeVectorProperty(m, 'identity_embedding', update.identity_embedding)
+        SET m.indexed_at = datetime(), m.content_hash = update.content_hash
+        REMOVE m:Unindexed
         """
         
-        self.neo4j_driver.execute_query(query, {"updates": updates})
+        await self._execute(query, {"updates": updates})
+
+    async def _refresh_embeddings(self, records: List, changed_key: str):
+        """Re-embed entities from observation-update records whose text changed
+        
+        The update queries return each entity's final name, type and
+        observations, so no re-fetch is needed before encoding.
+        """
+        from .server import Entity
+        
+        # Keep the last row per entity; it carries the final observations
+        changed = {}
+        for record in records:
+            if record.get(changed_key):
+                changed[(record.get("name"), record.get("type"))] = record
+        
+        entities = []
+        same_text = []
+        for (name, type_), record in changed.items():
+            entity = Entity(name=name, type=type_, observations=record.get("observations") or [])
+            # The texts may still match what the current embeddings came from
+            if record.get("content_hash") == _content_hash(self._compose_texts(entity)):
+                same_text.append({"name": name, "type": type_})
+            else:
+                entities.append(entity)
+        
+        if same_text:
+            logger.info(f"Skipped embedding refresh for {len(same_text)} entities whose texts are unchanged")
+        
+        if same_text:
+            await self._execute("""
+            UNWIND $entities as entity
+            MATCH (m:Unindexed {name: entity.name, type: entity.type})
+            REMOVE m:Unindexed
+            """, {"entities": same_text})
+        
+        for i in range(0, len(entities), BATCH_SIZE):
+            await self._update_embeddings_batch(entities[i:i+BATCH_SIZE])
 
     async def ensure_all_indexed(self):
         """Ensure all memories have embeddings, migrate if needed"""
         
-        # Count unindexed items
+        # Count unindexed items (label scan over stale nodes only)
         count_query = """
-        MATCH (m:Entity)
-        WHERE m.content_embedding IS NULL
+        MATCH (m:Unindexed)
         RETURN count(m) as unindexed_count
         """
         
-        result = self.neo4j_driver.execute_query(count_query)
+        result = await self._execute(count_query)
         unindexed_count = result.records[0]["unindexed_count"]
         
         if unindexed_count > 0:
@@ -449,52 +1336,24 @@ class VectorEnabledNeo4jMemory:
         """Fallback to fulltext search"""
         query = """
             CALL db.index.fulltext.queryNodes('search', $filter) yield node as entity, score
-            OPTIONAL MATCH (entity)-[r]-(other)
-            RETURN collect(distinct {
-                name: entity.name, 
-                type: entity.type, 
-                observations: entity.observations
-            }) as nodes,
-            collect(distinct {
+            RETURN entity.name as name,
+            entity.type as type,
+            coalesce(entity.observations, []) as observations,
+            [(entity)-[r]-() | {
                 source: startNode(r).name, 
                 target: endNode(r).name, 
                 relationType: type(r)
-            }) as relations
+            }] as relations
         """
         
-        result = self.neo4j_driver.execute_query(query, {"filter": filter_query})
-        return self._process_fulltext_results(result)
+        return await self._query_graph(query, {"filter": filter_query})
 
-    def _process_fulltext_results(self, result):
-        """Process fulltext search results"""
-        from .server import Entity, Relation, KnowledgeGraph
-        
-        if not result.records:
-            return KnowledgeGraph(entities=[], relations=[])
-        
-        record = result.records[0]
-        nodes = record.get('nodes')
-        rels = record.get('relations')
-        
-        entities = [
-            Entity(
-                name=node.get('name'),
-                type=node.get('type'),
-                observations=node.get('observations', [])
-            )
-            for node in nodes if node.get('name')
-        ]
-        
-        relations = [
-            Relation(
-                source=rel.get('source'),
-                target=rel.get('target'),
-                relationType=rel.get('relationType')
-            )
-            for rel in rels if rel.get('source') and rel.get('target') and rel.get('relationType')
-        ]
-        
-        return KnowledgeGraph(entities=entities, relations=relations)
+    def _process_fulltext_results(self, records):
+        """Build a KnowledgeGraph from streamed rows, one per entity with its relations"""
+        graph = _GraphBuilder()
+        for record in records:
+            graph.add(record)
+        return graph.build()
 
     async def search_nodes(self, query: str):
         """Enhanced search that tries vector first, fallback to fulltext"""
@@ -515,44 +1374,81 @@ class VectorEnabledNeo4jMemory:
         query = """
         MATCH (entity:Entity)
         WHERE entity.name IN $names
-        OPTIONAL MATCH (entity)-[r]-(other:Entity)
-        RETURN collect(distinct {
-            name: entity.name, 
-            type: entity.type, 
-            observations: entity.observations
-        }) as nodes,
-        collect(distinct {
+        RETURN entity.name as name,
+        entity.type as type,
+        coalesce(entity.observations, []) as observations,
+        [(entity)-[r]-(other:Entity) | {
+            source: startNode(r).name, 
+            target: endNode(r).name, 
+            relationType: type(r)
+        }] as relations
+        """
+        
+        return await self._query_graph(query, {"names": names})
+
+    async def find_nodes_by_type(self, type: str, skip: int = 0, limit: int = 1000):
+        """Find one page of entities of a type, ordered by name"""
+        query = """
+        MATCH (entity:Entity {type: $type})
+        WITH entity ORDER BY entity.name SKIP $skip LIMIT $limit
+        RETURN entity.name as name,
+        entity.type as type,
+        coalesce(entity.observations, []) as observations,
+        [(entity)-[r]-(other:Entity) | {
             source: startNode(r).name, 
             target: endNode(r).name, 
             relationType: type(r)
-        }) as relations
+        }] as relations
         """
         
-        result = self.neo4j_driver.execute_query(query, {"names": names})
-        return self._process_fulltext_results(result)
+        return await self._query_graph(query, {"type": type, "skip": skip, "limit": limit})
+
+    async def find_relations(
+        self,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+        rel_type: Optional[str] = None
+    ) -> List:
+        """Find relations by source name, target name and/or type (None matches anything)"""
+        from .server import Relation
+        
+        # Only the given filters go into the query, so the name index can anchor
+        # the match; that leaves a handful of fixed shapes for the plan cache
+        params = {"source": source, "target": target, "relType": rel_type}
+        params = {key: value for key, value in params.items() if value is not None}
+        source_filter = " {name: $source}" if "source" in params else ""
+        target_filter = " {name: $target}" if "target" in params else ""
+        type_filter = "WHERE type(r) = $relType" if "relType" in params else ""
+        
+        query = f"""
+        MATCH (source:Entity{source_filter})-[r]->(target:Entity{target_filter})
+        {type_filter}
+        RETURN DISTINCT source.name as source, target.name as target, type(r) as relationType
+        """
+        
+        return [
+            Relation(source=record["source"], target=record["target"], relationType=record["relationType"])
+            async for record in self._stream(query, params)
+        ]
 
     async def read_graph(self):
         """Read entire graph - finds all memory entities regardless of label"""
-        # Robust query that finds entities with :Entity label OR memory-like properties
+        # Robust query that finds entities with :Entity label OR memory-like properties.
+        # One row per entity, streamed, rather than one collect() of the whole graph
         query = """
         MATCH (entity)
         WHERE entity:Entity OR (entity.name IS NOT NULL AND entity.type IS NOT NULL)
-        OPTIONAL MATCH (entity)-[r]-(other)
-        WHERE other:Entity OR (other.name IS NOT NULL AND other.type IS NOT NULL)
-        RETURN collect(distinct {
-            name: entity.name, 
-            type: entity.type, 
-            observations: coalesce(entity.observations, [])
-        }) as nodes,
-        collect(distinct {
+        RETURN entity.name as name,
+        entity.type as type,
+        coalesce(entity.observations, []) as observations,
+        [(entity)-[r]-(other) WHERE other:Entity OR (other.name IS NOT NULL AND other.type IS NOT NULL) | {
             source: startNode(r).name, 
             target: endNode(r).name, 
             relationType: type(r)
-        }) as relations
+        }] as relations
         """
         
-        result = self.neo4j_driver.execute_query(query)
-        return self._process_fulltext_results(result)
+        return await self._query_graph(query)
 
     # Delegation methods for other operations
     async def add_observations(self, observations: List):
@@ -563,46 +1459,17 @@ class VectorEnabledNeo4jMemory:
         MATCH (e:Entity { name: obs.entityName })
         WITH e, [o in obs.contents WHERE NOT o IN e.observations] as new
         SET e.observations = coalesce(e.observations,[]) + new
-        RETURN e.name as name, new
+        FOREACH (_ IN CASE WHEN size(new) > 0 THEN [1] ELSE [] END | SET e:Unindexed)
+        RETURN e.name as name, e.type as type, e.observations as observations, e.content_hash as content_hash, new
         """
             
-        result = self.neo4j_driver.execute_query(
+        result = await self._execute(
             query, 
             {"observations": [obs.model_dump() if hasattr(obs, 'model_dump') else obs.__dict__ for obs in observations]}
         )
 
-        # Then update embeddings for affected entities
-        for obs in observations:
-            entity_query = """
-            MATCH (e:Entity { name: $name })
-            RETURN e.name as name, e.type as type, e.observations as observations
-            """
-            entity_result = self.neo4j_driver.execute_query(entity_query, {"name": obs.entityName})
-            
-            if entity_result.records:
-                from .server import Entity
-                record = entity_result.records[0]
-                entity = Entity(
-                    name=record["name"],
-                    type=record["type"],
-                    observations=record["observations"] or []
-                )
-                
-                # Regenerate embeddings
-                embeddings = self._generate_embeddings(entity)
-                
-                update_query = """
-                MATCH (e:Entity { name: $name })
-                SET e.content_embedding = $content_embedding
-                SET e.observation_embedding = $observation_embedding
-                SET e.identity_embedding = $identity_embedding
-                SET e.indexed_at = datetime()
-                """
-                
-                self.neo4j_driver.execute_query(update_query, {
-                    "name": entity.name,
-                    **embeddings
-                })
+        # Then update embeddings only for entities whose text actually changed
+        await self._refresh_embeddings(result.records, "new")
 
         results = [{"entityName": record.get("name"), "addedObservations": record.get("new")} for record in result.records]
         return results
@@ -615,74 +1482,42 @@ class VectorEnabledNeo4jMemory:
         DETACH DELETE e
         """
         
-        self.neo4j_driver.execute_query(query, {"entities": entity_names})
+        await self._execute(query, {"entities": entity_names})
 
     async def delete_observations(self, deletions: List) -> None:
         """Delete observations and update embeddings"""
         query = """
         UNWIND $deletions as d  
         MATCH (e:Entity { name: d.entityName })
-        SET e.observations = [o in coalesce(e.observations,[]) WHERE NOT o IN d.observations]
+        WITH e, [o in coalesce(e.observations,[]) WHERE NOT o IN d.observations] as kept
+        WITH e, kept, size(coalesce(e.observations,[])) <> size(kept) as changed
+        SET e.observations = kept
+        FOREACH (_ IN CASE WHEN changed THEN [1] ELSE [] END | SET e:Unindexed)
+        RETURN e.name as name, e.type as type, e.observations as observations, e.content_hash as content_hash, changed
         """
-        self.neo4j_driver.execute_query(
+        result = await self._execute(
             query, 
             {
                 "deletions": [deletion.model_dump() if hasattr(deletion, 'model_dump') else deletion.__dict__ for deletion in deletions]
             }
         )
         
-        # Update embeddings for affected entities
-        for deletion in deletions:
-            entity_query = """
-            MATCH (e:Entity { name: $name })
-            RETURN e.name as name, e.type as type, e.observations as observations
-            """
-            entity_result = self.neo4j_driver.execute_query(entity_query, {"name": deletion.entityName})
-            
-            if entity_result.records:
-                from .server import Entity
-                record = entity_result.records[0]
-                entity = Entity(
-                    name=record["name"],
-                    type=record["type"],
-                    observations=record["observations"] or []
-                )
-                
-                # Regenerate embeddings
-                embeddings = self._generate_embeddings(entity)
-                
-                update_query = """
-                MATCH (e:Entity { name: $name })
-                SET e.content_embedding = $content_embedding
-                SET e.observation_embedding = $observation_embedding
-                SET e.identity_embedding = $identity_embedding
-                SET e.indexed_at = datetime()
-                """
-                
-                self.neo4j_driver.execute_query(update_query, {
-                    "name": entity.name,
-                    **embeddings
-                })
+        # Update embeddings only for entities that lost an observation
+        await self._refresh_embeddings(result.records, "changed")
 
     async def delete_relations(self, relations: List) -> None:
         """Delete relations"""
+        # Relationship types can't be parameterized, so delete with one UNWIND per type;
+        # the query text per type is stable, so Neo4j reuses its cached plan
+        groups = defaultdict(list)
         for relation in relations:
             # Sanitize relation type for Cypher (remove special chars, spaces)
-            safe_rel_type = re.sub(r'[^a-zA-Z0-9_]', '_', relation.relationType)
-            
-            # Dynamic query with relation type (can't parameterize relationship types in Neo4j)
-            query = f"""
-            MATCH (source:Entity {{name: $source}})
-            WITH source LIMIT 1
-            MATCH (target:Entity {{name: $target}})
-            WITH source, target LIMIT 1
-            MATCH (source)-[r:{safe_rel_type}]->(target)
-            DELETE r
-            """
-            
-            self.neo4j_driver.execute_query(query, {
+            groups[_safe_rel_type(relation.relationType)].append({
                 "source": relation.source,
                 "target": relation.target
             })
-
- 
\ No newline at end of file
+        
+        await asyncio.gather(*(
+            self._execute(_delete_relations_query(safe_rel_type), {"rows": rows})
+            for safe_rel_type, rows in groups.items()
+        ))
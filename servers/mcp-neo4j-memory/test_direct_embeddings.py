@@ -9,18 +9,19 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from mcp_neo4j_memory.vector_memory import VectorEnabledNeo4jMemory
 from mcp_neo4j_memory.server import Entity
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
 
 async def test_embeddings():
     """Test creating entities with embeddings"""
     print("🧪 Testing VectorEnabledNeo4jMemory direct embeddings...")
     
     # Connect to Neo4j
-    driver = GraphDatabase.driver('bolt://localhost:7687', auth=('neo4j', 'password123'))
+    driver = AsyncGraphDatabase.driver('bolt://localhost:7687', auth=('neo4j', 'password123'))
     
     try:
         # Create memory instance (no auto-migrate to avoid migration logs)
-        memory = VectorEnabledNeo4jMemory(driver, auto_migrate=False)
+        memory = VectorEnabledNeo4jMemory(driver, auto_migrate=False, database="neo4j")
+        await memory.ensure_schema()
         print("✅ VectorEnabledNeo4jMemory initialized")
         
         # Create test entity
@@ -34,14 +35,14 @@ async def test_embeddings():
         result = await memory.create_entities([test_entity])
         print(f"✅ Created: {result[0].name}")
         
-        # Check if it has embeddings
+        # Check if it has embeddings (an index seek on the entity_name range index)
         check_query = """
-        MATCH (m:Memory {name: $name})
+        MATCH (m:Entity {name: $name})
         RETURN m.content_embedding IS NOT NULL as has_embedding,
                size(m.content_embedding) as embedding_size
         """
         
-        check_result = driver.execute_query(check_query, {"name": test_entity.name})
+        check_result = await driver.execute_query(check_query, {"name": test_entity.name}, database_="neo4j")
         
         if check_result.records:
             record = check_result.records[0]
@@ -56,7 +57,7 @@ async def test_embeddings():
             print("❌ FAILED! Entity not found")
             
     finally:
-        driver.close()
+        await driver.close()
 
 if __name__ == "__main__":
     asyncio.run(test_embeddings()) 
\ No newline at end of file
@@ -0,0 +1,82 @@
+import os
+import pytest
+
+# Named on every test query so the driver skips the home-database lookup
+TEST_DATABASE = os.environ.get("NEO4J_DATABASE", "neo4j")
+
+# Labels the integration tests create; every test node carries one of them
+TEST_LABELS = ["Entity", "Character", "Memory", "Test", "TestGroup"]
+
+# A label disjunction plans as a union of label scans instead of an
+# AllNodesScan. The text is built once, so Neo4j plans it once. Deletes are
+# committed in batches so a large leftover graph doesn't build one huge
+# transaction (IN TRANSACTIONS needs an auto-commit session.run, not execute_query)
+CLEANUP_QUERY = f"""
+MATCH (n)
+WHERE {" OR ".join(f"n:{label}" for label in TEST_LABELS)}
+CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF 1000 ROWS
+"""
+
+def pytest_report_header(config):
+    """Report which PackStream codec the driver uses for Bolt messages"""
+    from neo4j._codec.packstream import RUST_AVAILABLE
+    if RUST_AVAILABLE:
+        return "neo4j packstream: rust extension"
+    return "neo4j packstream: pure python (install neo4j-rust-ext for faster record encoding)"
+
+# Image for the throwaway test server; vector properties need Neo4j 5.18+
+NEO4J_TEST_IMAGE = os.environ.get("NEO4J_TEST_IMAGE", "neo4j:5.26")
+
+@pytest.fixture(scope="session")
+def neo4j_container():
+    """Start a throwaway Neo4j for the session when NEO4J_URI isn't set
+    
+    Needs testcontainers (and Docker). The connection settings are exported
+    as NEO4J_URI/NEO4J_USERNAME/NEO4J_PASSWORD, so the driver fixtures pick
+    them up unchanged. With NEO4J_URI set, or without testcontainers, this
+    does nothing and the tests use the configured server as before.
+    """
+    if os.environ.get("NEO4J_URI"):
+        yield None
+        return
+    try:
+        from testcontainers.neo4j import Neo4jContainer
+    except ImportError:
+        yield None
+        return
+    
+    with Neo4jContainer(NEO4J_TEST_IMAGE) as container:
+        settings = {
+            "NEO4J_URI": container.get_connection_url(),
+            "NEO4J_USERNAME": container.username,
+            "NEO4J_PASSWORD": container.password,
+        }
+        previous = {key: os.environ.get(key) for key in settings}
+        os.environ.update(settings)
+        try:
+            yield container
+        finally:
+            for key, value in previous.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+@pytest.fixture(autouse=True)
+def fresh_encoder():
+    """Drop the shared encoder so each test loads its own (possibly mocked) one"""
+    from mcp_neo4j_memory.vector_memory import _get_encoder
+    _get_encoder.cache_clear()
+    yield
+    _get_encoder.cache_clear()
+
+@pytest.fixture(scope="session")
+def clear_graph():
+    """Returns a function that deletes all test data through a driver
+    
+    Session-scoped so session fixtures can clear the graph too; it holds no state.
+    """
+    def clear(driver):
+        with driver.session(database=TEST_DATABASE) as session:
+            session.run(CLEANUP_QUERY).consume()
+    return clear
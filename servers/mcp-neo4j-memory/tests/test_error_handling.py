@@ -2,44 +2,70 @@ import os
 import pytest
 import asyncio
 from unittest.mock import Mock, patch
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from neo4j.exceptions import ServiceUnavailable, AuthError, TransientError
 from mcp_neo4j_memory.server import Entity, Relation, ObservationAddition, ObservationDeletion
 from mcp_neo4j_memory.vector_memory import VectorEnabledNeo4jMemory
+from mcp_neo4j_memory.config import MAX_SEQ_LENGTH
 
-@pytest.fixture(scope="function")
-def neo4j_driver():
-    """Create a Neo4j driver for error testing."""
+# Test data built once at import rather than in every test run
+SPECIAL_NAMES = (
+    "Name with spaces",
+    "Name-with-dashes", 
+    "Name_with_underscores",
+    "Name.with.dots",
+    "Name@with@symbols",
+    "Name'with'quotes",
+    'Name"with"double"quotes',
+    "Name[with]brackets",
+    "Name{with}braces",
+    "Name(with)parentheses",
+    "Namé with áccénts",
+    "名前 with unicode",
+    "🚀 with emojis 🎉"
+)
+LONG_NAME = "A" * 10000
+LONG_OBSERVATION = "This is a very long observation. " * 1000
+# Several times the encoder's token cap (~4 tokens per repeat), so truncation
+# is still exercised without building a 190KB string
+VERY_LONG_CONTENT = "Very long content. " * (MAX_SEQ_LENGTH * 2)
+DATABASE = os.environ.get("NEO4J_DATABASE", "neo4j")
+
+@pytest.fixture(scope="session")
+def neo4j_driver(neo4j_container):
+    """One Neo4j driver (and connection pool) shared by every error test."""
     uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
     user = os.environ.get("NEO4J_USERNAME", "neo4j")
     password = os.environ.get("NEO4J_PASSWORD", "password123")
     
-    driver = GraphDatabase.driver(uri, auth=(user, password))
+    driver = GraphDatabase.driver(
+        uri,
+        auth=(user, password),
+        max_connection_pool_size=50,
+        max_connection_lifetime=1800,
+        connection_acquisition_timeout=60
+    )
     
     try:
         driver.verify_connectivity()
     except Exception as e:
+        driver.close()
         pytest.skip(f"Could not connect to Neo4j: {e}")
     
-    # Clean up before tests
-    cleanup_query = """
-    MATCH (n)
-    WHERE n.name IS NOT NULL AND n.type IS NOT NULL
-    OR n:Entity OR n:Character OR n:Memory OR n:Test OR n:TestGroup
-    DETACH DELETE n
-    """
-    driver.execute_query(cleanup_query)
-    
     yield driver
-    
-    # Clean up after tests
-    driver.execute_query(cleanup_query)
     driver.close()
 
+@pytest.fixture(scope="session")
+def warm_graph(neo4j_driver):
+    """Touch Entity nodes and their properties once so later tests start on a warm page cache."""
+    neo4j_driver.execute_query("MATCH (n:Entity) RETURN count(n.name) as warmed", database_=DATABASE)
+
 @pytest.fixture(scope="function")
-def memory(neo4j_driver):
-    """Create a VectorEnabledNeo4jMemory instance."""
-    return VectorEnabledNeo4jMemory(neo4j_driver, auto_migrate=False)
+def memory(neo4j_driver, warm_graph, clear_graph):
+    """Create a VectorEnabledNeo4jMemory instance on a clean graph."""
+    clear_graph(neo4j_driver)
+    yield VectorEnabledNeo4jMemory(neo4j_driver, auto_migrate=False, database=DATABASE)
+    clear_graph(neo4j_driver)
 
 # INVALID INPUT TESTS
 
@@ -199,16 +225,12 @@ async def test_relations_with_nonexistent_entities(memory):
 async def test_extremely_long_inputs(memory):
     """Test with extremely long string inputs"""
     
-    # Very long name
-    long_name = "A" * 10000
-    long_observation = "This is a very long observation. " * 1000
-    
     try:
         await memory.create_entities([
-            Entity(name=long_name, type="Person", observations=[long_observation], labels=["Test"])
+            Entity(name=LONG_NAME, type="Person", observations=[LONG_OBSERVATION], labels=["Test"])
         ])
         # If it succeeds, verify it was stored
-        result = await memory.find_nodes([long_name])
+        result = await memory.find_nodes([LONG_NAME])
         assert len(result.entities) == 1
     except Exception:
         # It's acceptable to fail with very long inputs
@@ -218,24 +240,8 @@ async def test_extremely_long_inputs(memory):
 async def test_special_characters_in_names(memory):
     """Test entities with special characters in names"""
     
-    special_names = [
-        "Name with spaces",
-        "Name-with-dashes", 
-        "Name_with_underscores",
-        "Name.with.dots",
-        "Name@with@symbols",
-        "Name'with'quotes",
-        'Name"with"double"quotes',
-        "Name[with]brackets",
-        "Name{with}braces",
-        "Name(with)parentheses",
-        "Namé with áccénts",
-        "名前 with unicode",
-        "🚀 with emojis 🎉"
-    ]
-    
     entities = []
-    for i, name in enumerate(special_names):
+    for i, name in enumerate(SPECIAL_NAMES):
         try:
             entity = Entity(name=name, type="SpecialTest", observations=[f"Test {i}"], labels=["Special"])
             entities.append(entity)
@@ -246,9 +252,8 @@ async def test_special_characters_in_names(memory):
     if entities:
         await memory.create_entities(entities)
         # Verify at least some were created
-        result = await memory.read_graph()
-        special_entities = [e for e in result.entities if e.type == "SpecialTest"]
-        assert len(special_entities) > 0
+        result = await memory.find_nodes_by_type("SpecialTest")
+        assert len(result.entities) > 0
 
 @pytest.mark.asyncio
 async def test_very_large_batch_operations(memory):
@@ -266,9 +271,8 @@ async def test_very_large_batch_operations(memory):
         await memory.create_entities(large_batch)
         
         # If successful, verify some were created
-        result = await memory.read_graph()
-        batch_entities = [e for e in result.entities if e.type == "BatchTest"]
-        assert len(batch_entities) > 0
+        result = await memory.find_nodes_by_type("BatchTest")
+        assert len(result.entities) > 0
         
     except Exception as e:
         # Large batches might fail due to memory/performance limits - that's acceptable
@@ -313,7 +317,7 @@ async def test_circular_relationships(memory):
     ])
     
     # Should handle circular relationships without issues
-    result = await memory.read_graph()
+    result = await memory.find_nodes_by_type("Node")
     assert len(result.relations) == 3
 
 @pytest.mark.asyncio
@@ -329,8 +333,7 @@ async def test_self_referencing_relationships(memory):
         Relation(source="SelfRef", target="SelfRef", relationType="SELF_REFERENCE")
     ])
     
-    result = await memory.read_graph()
-    self_relations = [r for r in result.relations if r.source == r.target == "SelfRef"]
+    self_relations = await memory.find_relations(source="SelfRef", target="SelfRef")
     assert len(self_relations) == 1
 
 # SEARCH ERROR TESTS
@@ -370,11 +373,9 @@ async def test_embedding_generation_errors(memory):
     """Test error handling in embedding generation"""
     
     # Test with very long content that might cause embedding issues
-    very_long_content = "Very long content. " * 10000
-    
     try:
         await memory.create_entities([
-            Entity(name="LongContentTest", type="Test", observations=[very_long_content], labels=["Test"])
+            Entity(name="LongContentTest", type="Test", observations=[VERY_LONG_CONTENT], labels=["Test"])
         ])
     except Exception as e:
         # Long content might cause embedding failures - should be handled gracefully
@@ -382,33 +383,25 @@ async def test_embedding_generation_errors(memory):
 
 # CONNECTION ERROR SIMULATION TESTS
 
-@pytest.mark.asyncio
-async def test_database_connection_resilience():
+def test_database_connection_resilience():
     """Test behavior when database connection fails"""
     
     # Create a mock driver that fails
     mock_driver = Mock()
     mock_driver.execute_query.side_effect = ServiceUnavailable("Database unavailable")
     
-    memory = VectorEnabledNeo4jMemory(mock_driver, auto_migrate=False)
-    
-    # Operations should fail gracefully
+    # The first query at startup surfaces the error (no encoder is loaded for this)
     with pytest.raises(ServiceUnavailable):
-        await memory.create_entities([
-            Entity(name="Test", type="Person", observations=["test"], labels=["Test"])
-        ])
+        VectorEnabledNeo4jMemory._create_schema(mock_driver)
 
-@pytest.mark.asyncio
-async def test_authentication_errors():
+def test_authentication_errors():
     """Test behavior with authentication failures"""
     
     mock_driver = Mock()
     mock_driver.execute_query.side_effect = AuthError("Authentication failed")
     
-    memory = VectorEnabledNeo4jMemory(mock_driver, auto_migrate=False)
-    
     with pytest.raises(AuthError):
-        await memory.read_graph()
+        VectorEnabledNeo4jMemory._create_schema(mock_driver)
 
 # DATA INTEGRITY TESTS
 
@@ -443,24 +436,41 @@ async def test_malformed_observation_data(memory):
 async def test_concurrent_operations(memory):
     """Test concurrent operations for race conditions"""
     
-    # Create multiple concurrent operations
-    tasks = []
-    
-    for i in range(10):
-        task = memory.create_entities([
+    # An async driver, so the sub-batch writes really run in parallel on
+    # separate pooled connections instead of queueing behind one thread each
+    driver = AsyncGraphDatabase.driver(
+        os.environ.get("NEO4J_URI", "bolt://localhost:7687"),
+        auth=(os.environ.get("NEO4J_USERNAME", "neo4j"), os.environ.get("NEO4J_PASSWORD", "password123")),
+        max_connection_pool_size=10
+    )
+    try:
+        async_memory = VectorEnabledNeo4jMemory(driver, auto_migrate=False, database=DATABASE)
+        entities = [
             Entity(name=f"Concurrent{i}", type="Person", observations=[f"Test {i}"], labels=["Concurrent"])
-        ])
-        tasks.append(task)
-    
-    # Wait for all to complete
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+            for i in range(10)
+        ]
+        
+        # Each sub-batch is one UNWIND MERGE in its own session
+        results = await asyncio.gather(
+            *(async_memory.create_entities(entities[i:i + 2]) for i in range(0, len(entities), 2)),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        assert not errors
+        
+        # Independent reads run concurrently over the driver's pool
+        results = await asyncio.gather(
+            *(async_memory.find_nodes([f"Concurrent{i}"]) for i in range(10)),
+            return_exceptions=True
+        )
+    finally:
+        await driver.close()
     
-    # Some might succeed, some might fail due to concurrency - that's okay
-    # Check that at least some succeeded
-    successful_results = [r for r in results if not isinstance(r, Exception)]
-    assert len(successful_results) > 0
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert not errors
+    assert all(len(r.entities) == 1 for r in results)
     
     # Verify database state is consistent
-    result = await memory.read_graph()
-    concurrent_entities = [e for e in result.entities if e.type == "Person" and e.name.startswith("Concurrent")]
-    assert len(concurrent_entities) > 0 
\ No newline at end of file
+    result = await memory.find_nodes_by_type("Person")
+    concurrent_entities = [e for e in result.entities if e.name.startswith("Concurrent")]
+    assert len(concurrent_entities) == 10
@@ -1,29 +1,39 @@
 import pytest
 import asyncio
-from unittest.mock import Mock, AsyncMock
+import numpy as np
+from unittest.mock import Mock, MagicMock, AsyncMock
 from mcp_neo4j_memory.vector_memory import VectorEnabledNeo4jMemory
 from mcp_neo4j_memory.server import Entity, Relation
 
 # Mock the encoder globally
 mock_encoder = Mock()
-mock_encoder.encode.return_value = Mock()
-mock_encoder.encode.return_value.tolist.return_value = [0.1] * 1024
+mock_encoder.encode.side_effect = lambda texts, **kwargs: (
+    np.full((len(texts), 1024), 0.1, dtype=np.float32) if isinstance(texts, list)
+    else np.full(1024, 0.1, dtype=np.float32)
+)
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_neo4j_driver():
-    driver = Mock()
-    driver.execute_query = Mock()
+    # MagicMock, since startup opens a session for the one-time backfill
+    driver = MagicMock()
+    # Nothing stored yet, so the unchanged-entity lookup keeps every entity
+    driver.execute_query = Mock(return_value=Mock(records=[]))
     return driver
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def vector_memory(mock_neo4j_driver):
     # Patch the encoder import in the module
     import mcp_neo4j_memory.vector_memory as vm
     vm.SentenceTransformer = Mock(return_value=mock_encoder)
     
+    # Built once per module; tests only inspect the queries they issue
     memory = VectorEnabledNeo4jMemory(mock_neo4j_driver, auto_migrate=False)
     return memory
 
+@pytest.fixture(autouse=True)
+def reset_queries(vector_memory, mock_neo4j_driver):
+    mock_neo4j_driver.execute_query.reset_mock()
+
 @pytest.mark.asyncio
 class TestIntelligentMerge:
     """Test that entities with same names but different labels merge correctly"""
@@ -52,20 +62,22 @@ class TestIntelligentMerge:
         
         # Verify the MERGE query structure for first entity (skip index creation calls)
         calls = mock_neo4j_driver.execute_query.call_args_list
-        merge_calls = [call for call in calls if "MERGE" in str(call)]
+        merge_calls = [call for call in calls if "MERGE" in call.args[0]]
         assert len(merge_calls) > 0, "No MERGE queries found"
         merge_call = merge_calls[0]
         
         # Should MERGE by name and type only
         merge_query = merge_call[0][0]
         
-        assert "MERGE (e { name: $name, type: $type })" in merge_query
-        assert "ON CREATE SET e:Entity" in merge_query
-        assert "ON MATCH SET e:Entity" in merge_query
+        assert "MERGE (e:Entity { name: row.name, type: row.type })" in merge_query
+        
+        # Embeddings are stored as float32 vector properties
+        assert "CALL db.create.setNodeVectorProperty(e, 'content_embedding', row.content_embedding)" in merge_query
         
-        # Should have label addition calls
-        label_calls = [call for call in calls if "SET e:Blockchain" in str(call) or "SET e:Technology" in str(call)]
-        assert len(label_calls) == 2
+        # Labels are added in the same query, only for rows that carry them
+        assert "SET e:Blockchain" in merge_query
+        assert "SET e:Technology" in merge_query
+        assert merge_call[0][1]["rows"][0]["labels"] == ["Blockchain", "Technology"]
         
         # Reset mock for second entity
         mock_neo4j_driver.execute_query.reset_mock()
@@ -75,22 +87,21 @@ class TestIntelligentMerge:
         
         # Verify second entity merges correctly
         calls = mock_neo4j_driver.execute_query.call_args_list
-        merge_calls = [call for call in calls if "MERGE" in str(call)]
+        merge_calls = [call for call in calls if "MERGE" in call.args[0]]
         assert len(merge_calls) > 0, "No MERGE queries found for second entity"
         merge_call = merge_calls[0]
         
         merge_query = merge_call[0][0]
         
         # Should still MERGE by name and type
-        assert "MERGE (e { name: $name, type: $type })" in merge_query
-        assert "ON MATCH SET e:Entity" in merge_query
+        assert "MERGE (e:Entity { name: row.name, type: row.type })" in merge_query
         
         # Should combine observations
-        assert "e.observations + [obs in $observations WHERE NOT obs IN e.observations]" in merge_query
+        assert "e.observations + [obs in row.observations WHERE NOT obs IN e.observations]" in merge_query
         
         # Should add new labels
-        label_calls = [call for call in calls if "SET e:Digital" in str(call) or "SET e:Platform" in str(call)]
-        assert len(label_calls) == 2
+        assert "SET e:Digital" in merge_query
+        assert "SET e:Platform" in merge_query
 
     async def test_different_names_no_merge(self, vector_memory, mock_neo4j_driver):
         """Test that entities with different names don't merge"""
@@ -111,14 +122,16 @@ class TestIntelligentMerge:
         
         await vector_memory.create_entities([entity1, entity2])
         
-        # Should have separate MERGE calls for each entity
+        # Should have a separate MERGE row for each entity in one batched query
         calls = mock_neo4j_driver.execute_query.call_args_list
-        merge_calls = [call for call in calls if "MERGE" in str(call[0][0])]
+        merge_calls = [call for call in calls if "MERGE" in call.args[0]]
         
-        assert len(merge_calls) == 2
+        assert len(merge_calls) == 1
+        rows = merge_calls[0][0][1]["rows"]
+        assert len(rows) == 2
         
         # Verify each has different name
-        names = [call[0][1]["name"] for call in merge_calls]
+        names = [row["name"] for row in rows]
         assert "Bitcoin" in names
         assert "Ethereum" in names
 
@@ -141,17 +154,49 @@ class TestIntelligentMerge:
         
         await vector_memory.create_entities([entity1, entity2])
         
-        # Should have separate MERGE calls 
+        # Should have separate MERGE rows
         calls = mock_neo4j_driver.execute_query.call_args_list
-        merge_calls = [call for call in calls if "MERGE" in str(call[0][0])]
+        merge_calls = [call for call in calls if "MERGE" in call.args[0]]
         
-        assert len(merge_calls) == 2
+        assert len(merge_calls) == 1
+        rows = merge_calls[0][0][1]["rows"]
+        assert len(rows) == 2
         
         # Verify different types
-        types = [call[0][1]["type"] for call in merge_calls]
+        types = [row["type"] for row in rows]
         assert "Company" in types
         assert "Fruit" in types
 
+    async def test_intra_batch_dedup(self, vector_memory, mock_neo4j_driver):
+        """Test duplicates within one call are folded into a single MERGE row"""
+        
+        entity1 = Entity(
+            name="Ethereum",
+            type="Technology",
+            observations=["Smart contract platform", "Uses proof of stake"],
+            labels=["Blockchain"]
+        )
+        
+        entity2 = Entity(
+            name="Ethereum",
+            type="Technology",
+            observations=["Uses proof of stake", "Supports DeFi applications"],
+            labels=["Digital", "Blockchain"]
+        )
+        
+        await vector_memory.create_entities([entity1, entity2])
+        
+        calls = mock_neo4j_driver.execute_query.call_args_list
+        merge_calls = [call for call in calls if "MERGE" in call.args[0]]
+        
+        assert len(merge_calls) == 1
+        rows = merge_calls[0][0][1]["rows"]
+        assert len(rows) == 1
+        assert rows[0]["observations"] == [
+            "Smart contract platform", "Uses proof of stake", "Supports DeFi applications"
+        ]
+        assert rows[0]["labels"] == ["Blockchain", "Digital"]
+
     async def test_observation_merging(self, vector_memory, mock_neo4j_driver):
         """Test that observations merge correctly without duplicates"""
         
@@ -179,13 +224,13 @@ class TestIntelligentMerge:
         
         # Check the ON MATCH query handles observation deduplication
         calls = mock_neo4j_driver.execute_query.call_args_list
-        merge_calls = [call for call in calls if "MERGE" in str(call)]
+        merge_calls = [call for call in calls if "MERGE" in call.args[0]]
         assert len(merge_calls) > 0, "No MERGE queries found"
         merge_call = merge_calls[0]
         merge_query = merge_call[0][0]
         
         # Should have deduplication logic
-        assert "e.observations + [obs in $observations WHERE NOT obs IN e.observations]" in merge_query
+        assert "e.observations + [obs in row.observations WHERE NOT obs IN e.observations]" in merge_query
 
     async def test_relations_work_after_merge(self, vector_memory, mock_neo4j_driver):
         """Test that relations work correctly after entity merging"""
@@ -206,10 +251,10 @@ class TestIntelligentMerge:
         relation_call = calls[0]
         relation_query = relation_call[0][0]
         
-        assert "MATCH (from:Entity {name: $source})" in relation_query
-        assert "WITH from LIMIT 1" in relation_query
-        assert "MATCH (to:Entity {name: $target})" in relation_query
-        assert "WITH from, to LIMIT 1" in relation_query
+        assert "MATCH (from:Entity {name: row.source})" in relation_query
+        assert "RETURN from LIMIT 1" in relation_query
+        assert "MATCH (to:Entity {name: row.target})" in relation_query
+        assert "RETURN to LIMIT 1" in relation_query
         assert "MERGE (from)-[r:WORKS_WITH]->(to)" in relation_query
 
     async def test_no_memory_label_anywhere(self, vector_memory, mock_neo4j_driver):
@@ -224,12 +269,11 @@ class TestIntelligentMerge:
         
         await vector_memory.create_entities([entity])
         
-        # Check all queries for Memory label
-        all_calls = mock_neo4j_driver.execute_query.call_args_list
-        for call in all_calls:
-            query = str(call[0][0])
-            assert ":Memory" not in query, f"Found Memory label in query: {query}"
-            assert "Memory" not in query or "Memory" in ["VectorEnabledNeo4jMemory", "memory"], f"Unexpected Memory reference: {query}"
+        # Check all queries for Memory label (any reference at all, which covers :Memory)
+        queries = [call.args[0] for call in mock_neo4j_driver.execute_query.call_args_list]
+        offending = [query for query in queries if "Memory" in query]
+        assert queries
+        assert not offending, f"Unexpected Memory reference: {offending[0]}"
 
     async def test_entity_base_label_always_present(self, vector_memory, mock_neo4j_driver):
         """Test that Entity base label is always added"""
@@ -244,10 +288,10 @@ class TestIntelligentMerge:
         await vector_memory.create_entities([entity])
         
         calls = mock_neo4j_driver.execute_query.call_args_list
-        merge_calls = [call for call in calls if "MERGE" in str(call)]
+        merge_calls = [call for call in calls if "MERGE" in call.args[0]]
         assert len(merge_calls) > 0, "No MERGE queries found"
         merge_call = merge_calls[0]
         merge_query = merge_call[0][0]
         
-        # Should set Entity label
-        assert "SET e:Entity" in merge_query 
\ No newline at end of file
+        # Entity label is part of the MERGE pattern
+        assert "MERGE (e:Entity {" in merge_query 
\ No newline at end of file
@@ -2,16 +2,29 @@ import pytest
 import pytest_asyncio
 import os
 import asyncio
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, READ_ACCESS, Result, RoutingControl
 from mcp_neo4j_memory.server import Entity, Relation
 from mcp_neo4j_memory.vector_memory import VectorEnabledNeo4jMemory
 
+# Verification lookups take the name as a parameter, so every test reuses one plan
+ENTITY_QUERY = """
+MATCH (e:Entity {name: $name})
+RETURN e.name as name, e.type as type, e.observations as observations, labels(e) as labels
+"""
+
+def single(memory, query, params):
+    """Run a one-row verification query and return just that record"""
+    return memory.neo4j_driver.execute_query(
+        query, params, database_=memory.database, result_transformer_=Result.single
+    )
+
 def get_neo4j_credentials():
     """Get Neo4j credentials from environment"""
     return {
         "uri": os.getenv("NEO4J_URI", "bolt://localhost:7687"),
         "username": os.getenv("NEO4J_USERNAME", "neo4j"), 
-        "password": os.getenv("NEO4J_PASSWORD", "password123")
+        "password": os.getenv("NEO4J_PASSWORD", "password123"),
+        "database": os.getenv("NEO4J_DATABASE", "neo4j")
     }
 
 @pytest.mark.integration
@@ -20,7 +33,7 @@ class TestMergeIntegration:
     """Integration tests for entity merging with real Neo4j"""
     
     @pytest_asyncio.fixture(scope="class")
-    async def neo4j_memory(self):
+    async def neo4j_memory(self, neo4j_container):
         """Setup real Neo4j connection for testing"""
         try:
             creds = get_neo4j_credentials()
@@ -32,28 +45,32 @@ class TestMergeIntegration:
             # Test connection
             driver.verify_connectivity()
             
-            memory = VectorEnabledNeo4jMemory(driver, auto_migrate=False)
+            memory = VectorEnabledNeo4jMemory(driver, auto_migrate=False, database=creds["database"])
             
             # Clean up test data first
-            self._cleanup_test_data(driver)
+            self._cleanup_test_data(driver, creds["database"])
             
             yield memory
             
             # Cleanup after tests
-            self._cleanup_test_data(driver)
+            self._cleanup_test_data(driver, creds["database"])
             driver.close()
             
         except Exception as e:
             pytest.skip(f"Neo4j not available: {e}")
     
-    def _cleanup_test_data(self, driver):
+    def _cleanup_test_data(self, driver, database):
         """Clean up test entities"""
         cleanup_query = """
-        MATCH (e)
-        WHERE e.name IN ['Ethereum', 'Bitcoin', 'TestMerge', 'Alice', 'Bob', 'Python', 'NoMemoryTest']
+        MATCH (e:Entity)
+        WHERE e.name IN $names
         DETACH DELETE e
         """
-        driver.execute_query(cleanup_query)
+        driver.execute_query(cleanup_query, {
+            "names": ['Ethereum', 'Bitcoin', 'TestMerge', 'Alice', 'Bob', 'Python', 'NoMemoryTest']
+        }, database_=database, routing_=RoutingControl.WRITE,
+            # Only the summary is kept; no record list is built for the delete
+            result_transformer_=Result.consume)
 
     async def test_entity_merge_deduplication(self, neo4j_memory):
         """Test that same-named entities with different labels merge properly"""
@@ -81,12 +98,9 @@ class TestMergeIntegration:
         assert len(result2) == 1
         
         # Verify only one Ethereum entity exists
-        query = """
-        MATCH (e:Entity {name: 'Ethereum'})
-        RETURN e.name as name, e.type as type, e.observations as observations, labels(e) as labels
-        """
-        
-        result = neo4j_memory.neo4j_driver.execute_query(query)
+        result = neo4j_memory.neo4j_driver.execute_query(
+            ENTITY_QUERY, {"name": "Ethereum"}, database_=neo4j_memory.database
+        )
         assert len(result.records) == 1, "Should have exactly one Ethereum entity after merge"
         
         record = result.records[0]
@@ -127,12 +141,12 @@ class TestMergeIntegration:
         # Should have two separate entities
         query = """
         MATCH (e:Entity)
-        WHERE e.name IN ['Bitcoin', 'Ethereum']
+        WHERE e.name IN $names
         RETURN count(e) as count
         """
         
-        result = neo4j_memory.neo4j_driver.execute_query(query)
-        assert result.records[0]["count"] == 2
+        record = single(neo4j_memory, query, {"names": ["Bitcoin", "Ethereum"]})
+        assert record["count"] == 2
 
     async def test_observation_deduplication(self, neo4j_memory):
         """Test that duplicate observations are not added"""
@@ -157,20 +171,18 @@ class TestMergeIntegration:
         
         await neo4j_memory.create_entities([entity2])
         
-        # Check final state
+        # Check final state on the server; only a count and a flag come back
         query = """
-        MATCH (e:Entity {name: 'TestMerge'})
-        RETURN e.observations as observations
+        MATCH (e:Entity {name: $name})
+        RETURN size(e.observations) as count,
+               all(obs IN $expected WHERE obs IN e.observations) as complete
         """
-        
-        result = neo4j_memory.neo4j_driver.execute_query(query)
-        observations = result.records[0]["observations"]
+        expected = ["First observation", "Shared observation", "New observation"]
+        record = single(neo4j_memory, query, {"name": "TestMerge", "expected": expected})
         
         # Should have 3 unique observations
-        expected = ["First observation", "Shared observation", "New observation"]
-        assert len(observations) == 3
-        for obs in expected:
-            assert obs in observations
+        assert record["count"] == 3
+        assert record["complete"]
 
     async def test_relations_after_merge(self, neo4j_memory):
         """Test that relations work correctly after entity merging"""
@@ -179,20 +191,18 @@ class TestMergeIntegration:
         alice = Entity(name="Alice", type="Person", observations=["Developer"], labels=["Professional"])
         bob = Entity(name="Bob", type="Person", observations=["Manager"], labels=["Leadership"]) 
         
-        await neo4j_memory.create_entities([alice, bob])
-        
-        # Create relation
+        # Create relation, in the same transaction as the entities
         relation = Relation(source="Alice", target="Bob", relationType="WORKS_WITH")
-        await neo4j_memory.create_relations([relation])
+        await neo4j_memory.batch_writes(entities=[alice, bob], relations=[relation])
         
         # Verify relation exists
         query = """
-        MATCH (a:Entity {name: 'Alice'})-[r:WORKS_WITH]->(b:Entity {name: 'Bob'})
+        MATCH (a:Entity {name: $source})-[r:WORKS_WITH]->(b:Entity {name: $target})
         RETURN count(r) as count
         """
         
-        result = neo4j_memory.neo4j_driver.execute_query(query)
-        assert result.records[0]["count"] == 1
+        record = single(neo4j_memory, query, {"source": "Alice", "target": "Bob"})
+        assert record["count"] == 1
 
     async def test_no_memory_label_in_database(self, neo4j_memory):
         """Test that no Memory labels exist in the database"""
@@ -208,24 +218,28 @@ class TestMergeIntegration:
         await neo4j_memory.create_entities([entity])
         
         # Check that no Memory labels exist
-        query = """
+        memory_query = """
         MATCH (n:Memory)
         RETURN count(n) as count
         """
         
-        result = neo4j_memory.neo4j_driver.execute_query(query)
-        memory_count = result.records[0]["count"]
-        assert memory_count == 0, "Should not have any nodes with Memory label"
-        
         # Verify Entity label exists instead
-        query = """
-        MATCH (n:Entity {name: 'NoMemoryTest'})
+        entity_query = """
+        MATCH (n:Entity {name: $name})
         RETURN count(n) as count, labels(n) as labels
         """
         
-        result = neo4j_memory.neo4j_driver.execute_query(query)
-        assert result.records[0]["count"] == 1
-        labels = result.records[0]["labels"]
+        # Both checks share one read transaction
+        with neo4j_memory.neo4j_driver.session(
+            database=neo4j_memory.database, default_access_mode=READ_ACCESS
+        ) as session:
+            memory_record, entity_record = session.execute_read(
+                lambda tx: (tx.run(memory_query).single(), tx.run(entity_query, name="NoMemoryTest").single())
+            )
+        
+        assert memory_record["count"] == 0, "Should not have any nodes with Memory label"
+        assert entity_record["count"] == 1
+        labels = entity_record["labels"]
         assert "Entity" in labels
         assert "Test" in labels
         assert "Memory" not in labels
@@ -248,8 +262,8 @@ class TestMergeIntegration:
             labels=["AI"]
         )
         
-        await neo4j_memory.create_entities([entity1])
-        await neo4j_memory.create_entities([entity2])
+        # One call; the duplicate (name, type) is folded into a single row
+        await neo4j_memory.create_entities([entity1, entity2])
         
         # Test vector search
         try:
@@ -265,10 +279,5 @@ class TestMergeIntegration:
             
         except Exception as e:
             # If vector search fails, at least verify the entity merged correctly
-            query = """
-            MATCH (e:Entity {name: 'Python'})
-            RETURN e.observations as observations
-            """
-            result = neo4j_memory.neo4j_driver.execute_query(query)
-            observations = result.records[0]["observations"]
+            observations = single(neo4j_memory, ENTITY_QUERY, {"name": "Python"})["observations"]
             assert len(observations) == 2 
\ No newline at end of file
@@ -3,11 +3,15 @@ import pytest
 import asyncio
 from neo4j import GraphDatabase
 from mcp_neo4j_memory.server import Entity, Relation, ObservationAddition, ObservationDeletion
-from mcp_neo4j_memory.vector_memory import VectorEnabledNeo4jMemory
+from mcp_neo4j_memory.vector_memory import VectorEnabledNeo4jMemory, _VECTOR_QUERY, _HYBRID_QUERY
 
-@pytest.fixture(scope="function")
-def neo4j_driver():
-    """Create a Neo4j driver using environment variables for connection details."""
+@pytest.fixture(scope="session")
+def neo4j_driver(neo4j_container, clear_graph):
+    """Create a Neo4j driver using environment variables for connection details.
+    
+    Connected once per session; leftovers from earlier runs are cleared here
+    and clean_graph clears after each test.
+    """
     uri = os.environ.get("NEO4J_URI", "neo4j://localhost:7687")
     user = os.environ.get("NEO4J_USERNAME", "neo4j")
     password = os.environ.get("NEO4J_PASSWORD", "password")
@@ -18,34 +22,34 @@ def neo4j_driver():
     try:
         driver.verify_connectivity()
     except Exception as e:
+        driver.close()
         pytest.skip(f"Could not connect to Neo4j: {e}")
     
     # Clean up ALL test data before tests (comprehensive cleanup)
-    cleanup_query = """
-    MATCH (n)
-    WHERE n.name IS NOT NULL AND n.type IS NOT NULL
-    OR n:Entity OR n:Character OR n:Memory OR n:Test OR n:TestGroup
-    DETACH DELETE n
-    """
-    driver.execute_query(cleanup_query)
+    clear_graph(driver)
     
     yield driver
     
-    # Clean up ALL test data after tests (comprehensive cleanup)
-    driver.execute_query(cleanup_query)
-    
     driver.close()
 
-@pytest.fixture(scope="function")
+@pytest.fixture(autouse=True)
+def clean_graph(neo4j_driver, clear_graph):
+    """Clean up ALL test data after each test on the shared driver"""
+    yield
+    clear_graph(neo4j_driver)
+
+@pytest.fixture(scope="session")
 def memory(neo4j_driver):
-    """Create a VectorEnabledNeo4jMemory instance with the Neo4j driver."""
-    return VectorEnabledNeo4jMemory(neo4j_driver)
+    """Create a VectorEnabledNeo4jMemory instance with the Neo4j driver.
+    
+    Built once per session, so the encoder loads and the schema and migration
+    checks run once; clean_graph still empties the graph after every test.
+    """
+    return VectorEnabledNeo4jMemory(neo4j_driver, database=os.environ.get("NEO4J_DATABASE", "neo4j"))
 
 @pytest.mark.asyncio
 async def test_create_and_read_entities(memory):
-    # Get initial state
-    initial_graph = await memory.read_graph()
-    initial_entity_count = len(initial_graph.entities)
+    # The graph starts empty (clean_graph), so no initial read is needed
     
     # Create test entities
     test_entities = [
@@ -73,8 +77,8 @@ async def test_create_and_read_entities(memory):
     # Read the graph
     graph = await memory.read_graph()
     
-    # Verify entities were persisted (should be initial + 2 new entities)
-    assert len(graph.entities) == initial_entity_count + 2
+    # Verify entities were persisted
+    assert len(graph.entities) == 2
     
     # Check persisted data matches created data
     entities_by_name = {entity.name: entity for entity in graph.entities}
@@ -135,8 +139,8 @@ async def test_add_observations(memory):
     result = await memory.add_observations(observation_additions)
     assert len(result) == 1
     
-    # Read the graph
-    graph = await memory.read_graph()
+    # Look Charlie up directly rather than reading the whole graph
+    graph = await memory.find_nodes(["Charlie"])
     
     # Find Charlie
     charlie = next((e for e in graph.entities if e.name == "Charlie"), None)
@@ -165,8 +169,8 @@ async def test_delete_observations(memory):
     
     await memory.delete_observations(observation_deletions)
     
-    # Read the graph
-    graph = await memory.read_graph()
+    # Look Dave up directly rather than reading the whole graph
+    graph = await memory.find_nodes(["Dave"])
     
     # Find Dave
     dave = next((e for e in graph.entities if e.name == "Dave"), None)
@@ -189,8 +193,8 @@ async def test_delete_entities(memory):
     # Delete one entity
     await memory.delete_entities(["Eve"])
     
-    # Read the graph
-    graph = await memory.read_graph()
+    # Look up just the two test entities
+    graph = await memory.find_nodes(["Eve", "Frank"])
     
     # Verify Eve was deleted but Frank remains
     entity_names = [e.name for e in graph.entities]
@@ -204,14 +208,14 @@ async def test_delete_relations(memory):
         Entity(name="Grace", type="Person", observations=[], labels=["Test"]),
         Entity(name="Hank", type="Person", observations=[], labels=["Test"])
     ]
-    await memory.create_entities(test_entities)
     
     # Create test relations
     test_relations = [
         Relation(source="Grace", target="Hank", relationType="KNOWS"),
         Relation(source="Grace", target="Hank", relationType="WORKS_WITH")
     ]
-    await memory.create_relations(test_relations)
+    # Setup only, so entities and relations share one transaction
+    await memory.batch_writes(entities=test_entities, relations=test_relations)
     
     # Delete one relation
     relations_to_delete = [
@@ -219,12 +223,12 @@ async def test_delete_relations(memory):
     ]
     await memory.delete_relations(relations_to_delete)
     
-    # Read the graph
-    graph = await memory.read_graph()
+    # Look up just the relations between the two test entities
+    relations = await memory.find_relations(source="Grace", target="Hank")
     
     # Verify only the WORKS_WITH relation remains
-    assert len(graph.relations) == 1
-    assert graph.relations[0].relationType == "WORKS_WITH"
+    assert len(relations) == 1
+    assert relations[0].relationType == "WORKS_WITH"
 
 @pytest.mark.asyncio
 async def test_search_nodes(memory):
@@ -272,10 +276,7 @@ async def test_find_nodes(memory):
 @pytest.mark.asyncio
 async def test_read_graph_dedicated(memory):
     """Dedicated test for read_graph functionality"""
-    # Get initial state (should be empty with proper cleanup, but be robust)
-    initial_graph = await memory.read_graph()
-    initial_entity_count = len(initial_graph.entities)
-    initial_relation_count = len(initial_graph.relations)
+    # The graph starts empty (clean_graph), so the one read below sees only this data
     
     # Create test data
     test_entities = [
@@ -283,26 +284,25 @@ async def test_read_graph_dedicated(memory):
         Entity(name="Bob", type="Person", observations=["Team lead"], labels=["Manager"]),
         Entity(name="Project X", type="Project", observations=["Q2 initiative"], labels=["Active"])
     ]
-    await memory.create_entities(test_entities)
     
     test_relations = [
         Relation(source="Alice", target="Bob", relationType="REPORTS_TO"),
         Relation(source="Bob", target="Project X", relationType="MANAGES")
     ]
-    await memory.create_relations(test_relations)
+    await memory.batch_writes(entities=test_entities, relations=test_relations)
     
     # Test full graph read
     graph = await memory.read_graph()
     
-    # Verify entities were added (should be initial + 3 new entities)
-    assert len(graph.entities) == initial_entity_count + 3
+    # Verify entities were added
+    assert len(graph.entities) == 3
     entity_names = [e.name for e in graph.entities]
     assert "Alice" in entity_names
     assert "Bob" in entity_names
     assert "Project X" in entity_names
     
-    # Verify relations were added (should be initial + 2 new relations)
-    assert len(graph.relations) == initial_relation_count + 2
+    # Verify relations were added
+    assert len(graph.relations) == 2
     relation_types = [r.relationType for r in graph.relations]
     assert "REPORTS_TO" in relation_types
     assert "MANAGES" in relation_types
@@ -324,22 +324,15 @@ async def test_open_nodes(memory):
     ]
     await memory.create_entities(test_entities)
     
-    # Test find_nodes
-    find_result = await memory.find_nodes(["Node1", "Node3"])
-    
-    # Since open_nodes calls find_nodes in the server, we test it through the vector memory
+    # open_nodes is routed to find_nodes in the server, so the one call made
+    # here is the same call open_nodes makes
     # In practice this would be tested through the MCP server interface
-    open_result = await memory.find_nodes(["Node1", "Node3"])  # Same call as open_nodes makes
+    open_result = await memory.find_nodes(["Node1", "Node3"])
     
-    # Results should be identical
-    assert len(find_result.entities) == len(open_result.entities) == 2
+    assert len(open_result.entities) == 2
     
-    find_names = [e.name for e in find_result.entities]
-    open_names = [e.name for e in open_result.entities]
-    assert find_names == open_names
-    assert "Node1" in find_names
-    assert "Node3" in find_names
-    assert "Node2" not in find_names
+    open_names = {e.name for e in open_result.entities}
+    assert open_names == {"Node1", "Node3"}
 
 
 @pytest.mark.asyncio
@@ -351,7 +344,7 @@ async def test_read_graph_with_legacy_data(memory):
     CREATE (new:Entity {name: 'NewChar', type: 'Character', observations: ['New data']})
     CREATE (old)-[:KNOWS]->(new)
     """
-    memory.neo4j_driver.execute_query(legacy_query)
+    memory.neo4j_driver.execute_query(legacy_query, database_=memory.database)
     
     # read_graph should find both legacy and new nodes
     graph = await memory.read_graph()
@@ -377,21 +370,40 @@ async def test_vector_search_modes(memory):
     ]
     await memory.create_entities(test_entities)
     
+    # The searches are independent reads, so run them concurrently
+    content, observations, identity, custom = await asyncio.gather(
+        memory.vector_search("programming technology", mode="content"),
+        memory.vector_search("programming", mode="observations"),
+        memory.vector_search("Python", mode="identity"),
+        memory.vector_search("technology", threshold=0.1, limit=5),
+    )
+    
     # Test content mode (default)
-    result = await memory.vector_search("programming technology", mode="content")
-    entity_names = [e.name for e in result.entities]
-    assert len(entity_names) > 0
+    assert len(content.entities) > 0
     
     # Test observations mode  
-    result = await memory.vector_search("programming", mode="observations")
-    entity_names = [e.name for e in result.entities]
-    assert len(entity_names) > 0
+    assert len(observations.entities) > 0
     
     # Test identity mode
-    result = await memory.vector_search("Python", mode="identity")
-    entity_names = [e.name for e in result.entities]
+    entity_names = [e.name for e in identity.entities]
     assert "Python" in entity_names
     
     # Test with custom threshold and limit
-    result = await memory.vector_search("technology", threshold=0.1, limit=5)
-    assert len(result.entities) <= 5
\ No newline at end of file
+    assert len(custom.entities) <= 5
+
+@pytest.mark.parametrize("query", [_VECTOR_QUERY, _HYBRID_QUERY], ids=["vector", "hybrid"])
+def test_search_queries_compile(memory, neo4j_driver, query):
+    """Test the fixed search queries are valid Cypher (EXPLAIN plans without running)"""
+    neo4j_driver.execute_query(f"EXPLAIN {query}", database_=memory.database)
+
+@pytest.mark.asyncio
+async def test_hybrid_search(memory):
+    """Test hybrid search runs against the real indexes and finds the best match"""
+    await memory.create_entities([
+        Entity(name="Python", type="Technology", observations=["Programming language", "Used for AI"]),
+        Entity(name="Hiking", type="Activity", observations=["Walking in the mountains"])
+    ])
+    
+    result = await memory.hybrid_search("Python programming language", threshold=0.1, limit=5)
+    
+    assert "Python" in [e.name for e in result.entities]